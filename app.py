@@ -4,11 +4,43 @@ import os
 import signal
 import threading
 import time
+from daemon_auth import new_daemon_env
 
 app = Flask(__name__)
 processes = {}
 current_mode = None
 websocket_server_process = None
+gesture_daemon_process = None
+# Private socket address + random auth key of the running daemon, handed to it and to the modes
+gesture_daemon_env = {}
+
+# Modes wait this long for the gesture daemon instead of opening the camera themselves
+GESTURE_DAEMON_WAIT = "15"
+
+def start_gesture_daemon():
+    # Owns the camera and MediaPipe model across mode switches
+    global gesture_daemon_process, gesture_daemon_env
+    if gesture_daemon_process is None or gesture_daemon_process.poll() is not None:
+        gesture_daemon_env = new_daemon_env()
+        gesture_daemon_process = subprocess.Popen(
+            ["python", "gesture_daemon.py"], env={**os.environ, **gesture_daemon_env}
+        )
+
+def stop_gesture_daemon():
+    global gesture_daemon_process
+    if gesture_daemon_process and gesture_daemon_process.poll() is None:
+        gesture_daemon_process.terminate()
+    gesture_daemon_process = None
+
+def mode_env():
+    env = os.environ.copy()
+    # Nobody watches the preview windows of modes launched from here; run them headless unless
+    # AIRCLICK_PREVIEW=on is set for the app
+    env.setdefault("AIRCLICK_PREVIEW", "off")
+    if gesture_daemon_process and gesture_daemon_process.poll() is None:
+        env["AIRCLICK_GESTURE_DAEMON_WAIT"] = GESTURE_DAEMON_WAIT
+        env.update(gesture_daemon_env)
+    return env
 
 @app.route('/')
 def home():
@@ -78,16 +110,18 @@ def run_mode():
     stop_all_processes()
 
     try:
+        if mode in ('regular', 'movie', 'game', 'presentation', 'camera'):
+            start_gesture_daemon()
         if mode == 'regular':
-            proc = subprocess.Popen(["python", "regular.py"])
+            proc = subprocess.Popen(["python", "regular.py"], env=mode_env())
         elif mode == 'movie':
-            proc = subprocess.Popen(["python", "movie.py"])
+            proc = subprocess.Popen(["python", "movie.py"], env=mode_env())
         elif mode == 'game':
-            proc = subprocess.Popen(["python", "game.py"])
+            proc = subprocess.Popen(["python", "game.py"], env=mode_env())
         elif mode == 'presentation':
-            proc = subprocess.Popen(["python", "presentation.py"])
+            proc = subprocess.Popen(["python", "presentation.py"], env=mode_env())
         elif mode == 'camera':
-            proc = subprocess.Popen(["python", "camera.py"])
+            proc = subprocess.Popen(["python", "camera.py"], env=mode_env())
         else:
             return jsonify({"message": "Invalid mode", "active": None, "status": "error"})
 
@@ -171,6 +205,7 @@ def shutdown():
     global websocket_server_process
     if websocket_server_process and websocket_server_process.poll() is None:
         websocket_server_process.terminate()
+    stop_gesture_daemon()
     return jsonify({"message": "All processes stopped", "status": "success"})
 
 if __name__ == '__main__':
@@ -180,4 +215,5 @@ if __name__ == '__main__':
         stop_all_processes()
         # Stop WebSocket server on exit
         if websocket_server_process and websocket_server_process.poll() is None:
-            websocket_server_process.terminate()
\ No newline at end of file
+            websocket_server_process.terminate()
+        stop_gesture_daemon()
\ No newline at end of file
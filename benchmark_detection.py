@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Offline replay benchmark for the hand detection server.
+
+Replays a recorded frame sequence (a directory of JPEG/PNG images or a video
+file) without a camera, either through the server's inference path on this
+thread (decode, resize, the session's AdaptiveHandTracker at a fixed quality
+tier, fist rules and debounce) or through the full WebSocket path using a local
+client simulator against an in-process WebSocketServer (or --uri for a running
+one). Reports throughput, per-stage latency percentiles, memory and
+fist-detection accuracy against labels.
+
+Labels are an optional CSV of "frame,fist" rows, where frame is the image file
+name (directory input) or the zero-based frame index (video input), and fist is
+1/0. Thresholds such as --min-fps make the script exit non-zero on regressions.
+
+    python benchmark_detection.py recordings/fist_clip.mp4 --labels recordings/fist_clip.csv
+    python benchmark_detection.py recordings/frames/ --mode websocket --min-accuracy 0.9
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+
+import cv2
+import websockets
+
+from hand_detection_server import (
+    FRAME_HEADER, FRAME_PROTOCOL_VERSION, CODEC_JPEG, DEFAULT_TIER, QUALITY_TIERS,
+    HandGestureDetector, HandsPool, InferencePool, WebSocketServer
+)
+from latency_stats import LatencyStats
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def load_frames(path, limit=None):
+    # [(frame key, BGR frame, JPEG bytes)]; keys are file names for directories, indices for videos
+    frames = []
+    if os.path.isdir(path):
+        names = sorted(name for name in os.listdir(path) if name.lower().endswith(IMAGE_EXTENSIONS))
+        for name in names[:limit]:
+            with open(os.path.join(path, name), 'rb') as f:
+                data = f.read()
+            frame = cv2.imread(os.path.join(path, name))
+            if frame is None:
+                print(f"⚠️ Skipping unreadable image: {name}")
+                continue
+            if not name.lower().endswith(('.jpg', '.jpeg')):
+                data = cv2.imencode('.jpg', frame)[1].tobytes()
+            frames.append((name, frame, data))
+        return frames
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"❌ Cannot open {path}")
+    index = 0
+    while limit is None or index < limit:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append((str(index), frame, cv2.imencode('.jpg', frame)[1].tobytes()))
+        index += 1
+    cap.release()
+    return frames
+
+
+def load_labels(path):
+    if not path:
+        return {}
+    labels = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            labels[row['frame'].strip()] = row['fist'].strip().lower() in ('1', 'true', 'yes')
+    return labels
+
+
+def rss_mb():
+    # Current resident set size; MediaPipe allocates natively, so tracemalloc would miss most of it
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def accuracy_report(predictions, labels):
+    # predictions: {frame key: fist_detected}; only labelled frames count
+    scored = [(predictions[key], labels[key]) for key in predictions if key in labels]
+    if not scored:
+        return None
+    tp = sum(1 for predicted, actual in scored if predicted and actual)
+    fp = sum(1 for predicted, actual in scored if predicted and not actual)
+    fn = sum(1 for predicted, actual in scored if not predicted and actual)
+    correct = sum(1 for predicted, actual in scored if predicted == actual)
+    return {
+        'labelled_frames': len(scored),
+        'accuracy': round(correct / len(scored), 4),
+        'precision': round(tp / (tp + fp), 4) if tp + fp else None,
+        'recall': round(tp / (tp + fn), 4) if tp + fn else None
+    }
+
+
+def bench_detector(frames, warmup=5, source_fps=30.0, tier=DEFAULT_TIER):
+    # The server's per-frame path without the network: InferencePool.process_frame (decode, resize,
+    # tracker, fist rules) and classify (debounce), one frame after another on this thread at one
+    # quality tier. Frames are stamped at the recording's rate so the debounce behaves as it did live.
+    width, height, model_complexity = QUALITY_TIERS[tier]
+    inference_pool = InferencePool(workers=1)
+    hands_pool = HandsPool()
+    detector = HandGestureDetector(hands_pool)
+
+    def run(index, frame, data):
+        payload = frame_message(index, frame, data, index / source_fps * 1000)
+        points, is_fist, meta = inference_pool.process_frame(
+            detector, 'binary', payload, (width, height), model_complexity
+        )
+        return detector.classify(points, is_fist, index / source_fps), meta
+
+    for index, (_, frame, data) in enumerate(frames[:warmup]):
+        run(index, frame, data)
+    # Start the measured replay from a fresh tracker and debounce
+    detector.release_hands()
+    detector.gestures.reset()
+    detector.consecutive_fist_frames = 0
+    detector.consecutive_no_fist_frames = 0
+
+    latency = LatencyStats()
+    predictions = {}
+    started = time.perf_counter()
+    for index, (key, frame, data) in enumerate(frames):
+        frame_started = time.perf_counter()
+        result, meta = run(index, frame, data)
+        latency.record('process_frame', (time.perf_counter() - frame_started) * 1000)
+        latency.record_all(meta.get('stage_ms', {}))
+        predictions[key] = result['fist_detected']
+    elapsed = time.perf_counter() - started
+    tracker_stats = detector.tracker.stats()
+    detector.release_hands()
+    hands_pool.close()
+    inference_pool.shutdown()
+    return {
+        'frames': len(frames),
+        'results': len(predictions),
+        'elapsed_s': round(elapsed, 3),
+        'fps': round(len(frames) / elapsed, 2) if elapsed else None,
+        'quality_tier': {'width': width, 'height': height, 'model_complexity': model_complexity},
+        'tracker': tracker_stats,
+        'latency': latency.summary()
+    }, predictions
+
+
+def frame_message(frame_id, frame, data, capture_ts):
+    # capture_ts (ms) paces the server's fist debounce, so it follows the recording, not the replay
+    height, width = frame.shape[:2]
+    header = FRAME_HEADER.pack(FRAME_PROTOCOL_VERSION, CODEC_JPEG, frame_id, capture_ts, width, height)
+    return header + data
+
+
+async def replay_websocket(uri, frames, fps=0.0, source_fps=30.0, result_timeout=2.0):
+    # Local client simulator: credit-based flow control like dino-game.html, compact JSON results.
+    # Frames are stamped replay start + index / source_fps, so the debounce sees the recording's timing
+    # however fast they are replayed (the server's network stage is not meaningful in this case).
+    latency = LatencyStats()
+    predictions = {}
+    sent_at = {}
+    async with websockets.connect(uri, max_size=None) as websocket:
+        await websocket.send(json.dumps({
+            'type': 'update_settings',
+            'result_format': 'compact',
+            'include_landmarks': False,
+            'flow_control': True
+        }))
+        credits = 1
+        credit_returned = asyncio.Event()
+        done = asyncio.Event()
+        server_latency = {}
+
+        async def receive():
+            nonlocal credits
+            async for message in websocket:
+                data = json.loads(message)
+                if data['type'] == 'flow_control':
+                    credits += data['data']['credits'] - 1
+                elif data['type'] == 'frame_credit':
+                    credits += data['data']['credits']
+                elif data['type'] == 'gesture_detection':
+                    result = data['data']
+                    frame_id = result.get('frame_id')
+                    if frame_id in sent_at:
+                        latency.record('round_trip', (time.perf_counter() - sent_at.pop(frame_id)) * 1000)
+                        predictions[frames[frame_id][0]] = result['fist_detected']
+                    credits += 1
+                elif data['type'] == 'latency_stats':
+                    server_latency.update(data['data']['session'])
+                    done.set()
+                    return
+                else:
+                    continue
+                credit_returned.set()
+
+        receiver = asyncio.create_task(receive())
+        started = time.perf_counter()
+        replay_epoch = time.time()
+        interval = 1.0 / fps if fps else 0.0
+        for frame_id, (_, frame, data) in enumerate(frames):
+            while credits <= 0:
+                credit_returned.clear()
+                try:
+                    await asyncio.wait_for(credit_returned.wait(), result_timeout)
+                except asyncio.TimeoutError:
+                    # A result went missing; treat its credit as returned, as the browser does
+                    credits += 1
+            credits -= 1
+            sent_at[frame_id] = time.perf_counter()
+            capture_ts = (replay_epoch + frame_id / source_fps) * 1000
+            await websocket.send(frame_message(frame_id, frame, data, capture_ts))
+            if interval:
+                await asyncio.sleep(max(0.0, started + (frame_id + 1) * interval - time.perf_counter()))
+
+        deadline = time.perf_counter() + result_timeout
+        while sent_at and time.perf_counter() < deadline:
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - started
+        await websocket.send(json.dumps({'type': 'get_latency_stats'}))
+        try:
+            await asyncio.wait_for(done.wait(), result_timeout)
+        except asyncio.TimeoutError:
+            pass
+        receiver.cancel()
+
+    return {
+        'frames': len(frames),
+        'results': len(predictions),
+        'lost_results': len(sent_at),
+        'elapsed_s': round(elapsed, 3),
+        'fps': round(len(predictions) / elapsed, 2) if elapsed else None,
+        'latency': latency.summary(),
+        'server_latency': server_latency
+    }, predictions
+
+
+async def bench_websocket_async(frames, uri=None, fps=0.0, workers=2, source_fps=30.0):
+    if uri:
+        return await replay_websocket(uri, frames, fps, source_fps)
+    server = WebSocketServer(inference_workers=workers)
+    try:
+        async with websockets.serve(server.handle_client, 'localhost', 0) as ws_server:
+            port = ws_server.sockets[0].getsockname()[1]
+            return await replay_websocket(f'ws://localhost:{port}', frames, fps, source_fps)
+    finally:
+        server.inference_pool.shutdown()
+        server.hands_pool.close()
+
+
+def check_thresholds(report, args):
+    failures = []
+    if args.min_fps is not None and (report['fps'] or 0) < args.min_fps:
+        failures.append(f"fps {report['fps']} < {args.min_fps}")
+    stage = 'process_frame' if args.mode == 'detector' else 'round_trip'
+    p95 = report['latency'].get(stage, {}).get('p95_ms')
+    if args.max_p95_ms is not None and (p95 is None or p95 > args.max_p95_ms):
+        failures.append(f"{stage} p95 {p95}ms > {args.max_p95_ms}ms")
+    accuracy = report.get('accuracy')
+    if args.min_accuracy is not None and (accuracy is None or accuracy['accuracy'] < args.min_accuracy):
+        failures.append(f"accuracy {accuracy and accuracy['accuracy']} < {args.min_accuracy}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded frames through the hand detection pipeline")
+    parser.add_argument('source', help="directory of JPEG/PNG frames or a video file")
+    parser.add_argument('--labels', help="CSV with frame,fist columns")
+    parser.add_argument('--mode', choices=('detector', 'websocket'), default='detector')
+    parser.add_argument('--uri', help="benchmark a running server instead of an in-process one")
+    parser.add_argument('--fps', type=float, default=0.0,
+                        help="replay rate for websocket mode (0 = as fast as credits allow)")
+    parser.add_argument('--source-fps', type=float, default=30.0,
+                        help="rate the frames were recorded at; frame timestamps for the fist debounce follow it")
+    parser.add_argument('--tier', type=int, default=DEFAULT_TIER, choices=range(len(QUALITY_TIERS)),
+                        help="quality tier (inference size and model_complexity) for detector mode")
+    parser.add_argument('--workers', type=int, default=2, help="inference workers for the in-process server")
+    parser.add_argument('--limit', type=int, help="only replay the first N frames")
+    parser.add_argument('--json', dest='json_path', help="also write the report to this file")
+    parser.add_argument('--min-fps', type=float)
+    parser.add_argument('--max-p95-ms', type=float)
+    parser.add_argument('--min-accuracy', type=float)
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.limit)
+    if not frames:
+        raise SystemExit(f"❌ No frames found in {args.source}")
+    labels = load_labels(args.labels)
+    print(f"🎞️ Replaying {len(frames)} frames from {args.source} ({args.mode} mode)")
+
+    rss_before = rss_mb()
+    if args.mode == 'detector':
+        report, predictions = bench_detector(frames, source_fps=args.source_fps, tier=args.tier)
+    else:
+        report, predictions = asyncio.run(
+            bench_websocket_async(frames, args.uri, args.fps, args.workers, args.source_fps)
+        )
+    report['memory'] = {'rss_before_mb': rss_before, 'rss_after_mb': rss_mb(), 'peak_rss_mb': peak_rss_mb()}
+    report['accuracy'] = accuracy_report(predictions, labels)
+
+    print(f"⚡ {report['results']}/{report['frames']} frames in {report['elapsed_s']}s ({report['fps']} fps)")
+    for stage, summary in report['latency'].items():
+        print(f"⏱️ {stage}: p50 {summary['p50_ms']}ms, p95 {summary['p95_ms']}ms, p99 {summary['p99_ms']}ms")
+    print(f"🧠 Memory: {report['memory']}")
+    if report['accuracy']:
+        print(f"🎯 Fist accuracy: {report['accuracy']}")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    failures = check_thresholds(report, args)
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Input injection benchmark.
+
+Drives the cursor stream regular.py produces (a smooth hand path sampled once
+per camera frame, with an occasional click) through each input backend and
+reports per-call injection latency and throughput. "direct" calls the backend
+in a tight loop; "dispatched" feeds an InputDispatcher at the camera rate and
+measures queue-to-injection latency, as the gesture modes see it.
+
+The mock backend writes the same uinput event stream to /dev/null, so the
+uinput code path can be measured without /dev/uinput access or a desktop.
+
+    python benchmark_input.py --backend mock uinput pyautogui
+    python benchmark_input.py --backend uinput --moves 5000 --rate 60 --json input.json
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+
+from input_backends import PyAutoGuiBackend, UinputBackend
+from input_dispatcher import InputDispatcher
+from latency_stats import LatencyStats
+
+CLICK_EVERY = 120
+
+
+def cursor_path(count, width, height):
+    # Lissajous sweep across the middle of the screen, like a hand drawing loops in front of the camera
+    for i in range(count):
+        t = i / 60.0
+        yield (width * (0.5 + 0.35 * math.sin(1.3 * t)), height * (0.5 + 0.35 * math.sin(1.7 * t + 0.5)))
+
+
+def open_backend(name, screen_size):
+    if name == 'mock':
+        return UinputBackend(screen_size=screen_size, mock=True)
+    if name == 'uinput':
+        return UinputBackend(screen_size=screen_size)
+    return PyAutoGuiBackend()
+
+
+def bench_direct(backend, moves, width, height):
+    latency = LatencyStats()
+    start = time.perf_counter()
+    for i, (x, y) in enumerate(cursor_path(moves, width, height)):
+        t0 = time.perf_counter()
+        backend.moveTo(int(x), int(y))
+        latency.record('moveTo', (time.perf_counter() - t0) * 1000)
+        if i % CLICK_EVERY == CLICK_EVERY - 1:
+            t0 = time.perf_counter()
+            backend.click()
+            latency.record('click', (time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - start
+    return {
+        'moves': moves,
+        'elapsed_s': round(elapsed, 3),
+        'moves_per_s': round(moves / elapsed, 1) if elapsed > 0 else 0.0,
+        'latency': latency.summary()
+    }
+
+
+def bench_dispatched(backend, moves, width, height, rate):
+    dispatcher = InputDispatcher(backend=backend)
+    interval = 1.0 / rate if rate > 0 else 0.0
+    start = time.perf_counter()
+    for i, (x, y) in enumerate(cursor_path(moves, width, height)):
+        dispatcher.move_to(int(x), int(y))
+        if i % CLICK_EVERY == CLICK_EVERY - 1:
+            dispatcher.click()
+        if interval:
+            delay = start + (i + 1) * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    dispatcher.close()
+    elapsed = time.perf_counter() - start
+    stats = dispatcher.stats()
+    return {
+        'moves': moves,
+        'rate_hz': rate,
+        'elapsed_s': round(elapsed, 3),
+        'coalesced_moves': stats['coalesced_moves'],
+        'errors': stats['errors'],
+        'latency': stats['latency']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure input injection latency and throughput per backend")
+    parser.add_argument('--backend', nargs='+', choices=('mock', 'uinput', 'pyautogui'), default=['mock'])
+    parser.add_argument('--moves', type=int, default=2000, help="cursor moves per run")
+    parser.add_argument('--rate', type=float, default=30.0,
+                        help="camera rate for the dispatched run (0 = as fast as possible)")
+    parser.add_argument('--screen', default='1920x1080', help="screen size for the uinput backends, WxH")
+    parser.add_argument('--json', dest='json_path', help="also write the report to this file")
+    args = parser.parse_args()
+
+    screen_size = tuple(int(v) for v in args.screen.lower().split('x'))
+    report = {}
+    for name in args.backend:
+        try:
+            backend = open_backend(name, screen_size)
+        except (OSError, ImportError) as e:
+            print(f"⚠️ Skipping {name}: {e}")
+            continue
+        width, height = backend.size()
+        try:
+            report[name] = {
+                'direct': bench_direct(backend, args.moves, width, height),
+                'dispatched': bench_dispatched(backend, args.moves, width, height, args.rate)
+            }
+        finally:
+            backend.close()
+
+        direct, dispatched = report[name]['direct'], report[name]['dispatched']
+        move = direct['latency']['moveTo']
+        print(f"⚡ {name}: {direct['moves_per_s']} moves/s, moveTo p50 {move['p50_ms']}ms, "
+              f"p95 {move['p95_ms']}ms, p99 {move['p99_ms']}ms")
+        for action, summary in dispatched['latency'].items():
+            print(f"⏱️ {name} dispatched {action}: p50 {summary['p50_ms']}ms, p95 {summary['p95_ms']}ms, "
+                  f"p99 {summary['p99_ms']}ms ({summary['count']} calls)")
+        print(f"🔀 {name}: {dispatched['coalesced_moves']} moves coalesced at {args.rate:g} Hz")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0 if report else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
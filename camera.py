@@ -1,109 +1,88 @@
-import cv2
-import mediapipe as mp
 import time
-from collections import deque
+import landmark_features
+from gesture_state import GestureStateMachine, PRESS
+from hand_source import open_hand_source
+from overlay import OverlayRenderer
+from recording import AsyncVideoRecorder, FrameRateMeter
 
 class CameraGestureControl:
     def __init__(self):
-        self.cap = cv2.VideoCapture(0)
         self.recording = False
-        self.video_writer = None
-        self.finger_history = deque(maxlen=5)
-        self.last_action_time = 0
-        self.action_delay = 1  # seconds between actions
+        # Encoding runs on a background thread; the frame rate it records at is measured, not assumed
+        self.recorder = AsyncVideoRecorder()
+        self.frame_rate = FrameRateMeter()
+        # A finger count must hold steady for press_ms before it acts, once per gesture
+        self.gestures = GestureStateMachine(press_ms=200, release_ms=150, cooldown_ms=1000)
+        # Preview on its own thread, drawn over a copy: recordings and photos stay free of overlays.
+        # Headless (no window, no drawing) when AIRCLICK_PREVIEW=off
+        self.preview = OverlayRenderer('Camera Gesture Control (Press Q to quit)', quit_keys=(ord('q'),))
         
-        # MediaPipe setup
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
+        # Camera + MediaPipe (shared gesture daemon when it is running)
+        self.source = open_hand_source(
             max_num_hands=1,
             min_detection_confidence=0.7,
             min_tracking_confidence=0.5
         )
-        self.mp_draw = mp.solutions.drawing_utils
         
-    def count_fingers(self, landmarks):
-        """Count extended fingers using MediaPipe landmarks"""
-        tips = [8, 12, 16, 20]  # Index, Middle, Ring, Pinky
-        thumb_tip = 4
-        fingers = 0
-        
-        # Check thumb (different logic)
-        if landmarks[thumb_tip].x < landmarks[thumb_tip - 1].x:
-            fingers += 1
-        
-        # Check other fingers
-        for tip in tips:
-            if landmarks[tip].y < landmarks[tip - 2].y:
-                fingers += 1
-                
-        return fingers
+    def count_fingers(self, points):
+        """Count extended fingers (thumb included) from a (21, 3) landmark array"""
+        return int(landmark_features.fingers_extended(points).sum())
     
-    def process_frame(self, frame):
-        frame = cv2.flip(frame, 1)
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(rgb)
+    def process_frame(self, hand_frame):
+        frame = hand_frame.frame  # Already mirrored
+        self.frame_rate.tick(hand_frame.timestamp)
         
         finger_count = 0
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                # Draw hand landmarks for visualization
-                self.mp_draw.draw_landmarks(
-                    frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
-                
+        if len(hand_frame.hands):
+            for points in hand_frame.hands:
                 # Count fingers
-                finger_count = self.count_fingers(hand_landmarks.landmark)
-                self.finger_history.append(finger_count)
-                
-                # Get most stable count from history
-                if len(self.finger_history) == self.finger_history.maxlen:
-                    finger_count = max(set(self.finger_history), 
-                                      key=list(self.finger_history).count)
+                finger_count = self.count_fingers(points)
         
         # Display finger count
-        cv2.putText(frame, f"Fingers: {finger_count}", (10, 30), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+        texts = [(f"Fingers: {finger_count}", (10, 30), (255, 255, 255))]
+        circles = []
         
-        # Process actions
-        current_time = time.time()
+        # Process actions on debounced finger counts
+        pressed = [
+            event.gesture for event in self.gestures.update(finger_count or None, hand_frame.timestamp)
+            if event.kind == PRESS
+        ]
         
         # Photo capture (2 fingers)
-        if finger_count == 2 and (current_time - self.last_action_time > self.action_delay):
+        if 2 in pressed:
             filename = f"photo_{time.strftime('%Y%m%d_%H%M%S')}.jpg"
-            cv2.imwrite(filename, frame)
-            print(f"Photo captured: {filename}")
-            self.last_action_time = current_time
-            cv2.putText(frame, "PHOTO TAKEN!", (50, 80), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+            # May keep a sharper frame from the last half second instead of this one
+            if self.recorder.save_photo(filename, frame, hand_frame.timestamp):
+                print(f"Photo captured: {filename}")
+            else:
+                print("Photo dropped: encoder is busy")
+            self.preview.flash("PHOTO TAKEN!", (50, 80), (0, 255, 0))
         
         # Start recording (3 fingers)
-        if finger_count == 3 and not self.recording and (current_time - self.last_action_time > self.action_delay):
+        if 3 in pressed and not self.recording:
             self.recording = True
-            fourcc = cv2.VideoWriter_fourcc(*'XVID')
             filename = f"video_{time.strftime('%Y%m%d_%H%M%S')}.avi"
-            self.video_writer = cv2.VideoWriter(
-                filename, fourcc, 20.0, (frame.shape[1], frame.shape[0]))
-            print(f"Started recording: {filename}")
-            cv2.putText(frame, "RECORDING STARTED", (50, 80), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-            self.last_action_time = current_time
+            fps = self.frame_rate.fps or 20.0
+            self.recorder.start(filename, (frame.shape[1], frame.shape[0]), fps)
+            print(f"Started recording: {filename} at {fps:.1f} fps (with the last few seconds of pre-roll)")
+            self.preview.flash("RECORDING STARTED", (50, 80), (0, 0, 255))
         
         # Stop recording (1 finger)
-        if finger_count == 1 and self.recording:
+        if 1 in pressed and self.recording:
             self.recording = False
-            self.video_writer.release()
-            print("Recording stopped")
-            cv2.putText(frame, "RECORDING STOPPED", (50, 80), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-            self.last_action_time = current_time
+            self.recorder.stop()
+            print(f"Recording stopped: {self.recorder.stats()}")
+            self.preview.flash("RECORDING STOPPED", (50, 80), (0, 0, 255))
         
-        # Record frame if recording
+        # Record frame if recording, otherwise keep it in the pre-roll buffer
+        if not self.recording:
+            self.recorder.buffer_frame(frame, hand_frame.timestamp)
         if self.recording:
-            self.video_writer.write(frame)
-            cv2.circle(frame, (frame.shape[1] - 30, 30), 10, (0, 0, 255), -1)
-            cv2.putText(frame, "RECORDING...", (frame.shape[1] - 150, 30), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            self.recorder.write(frame, hand_frame.timestamp)
+            circles.append(((frame.shape[1] - 30, 30), 10, (0, 0, 255), -1))
+            texts.append(("RECORDING...", (frame.shape[1] - 150, 30), (0, 0, 255), 0.7))
         
-        return frame
+        self.preview.submit(frame, hand_frame.hands, texts, circles)
     
     def run(self):
         print("Camera Gesture Control started:")
@@ -113,23 +92,24 @@ class CameraGestureControl:
         print("- Press 'q' to quit")
         
         while True:
-            ret, frame = self.cap.read()
-            if not ret:
+            hand_frame = self.source.read()
+            if hand_frame is None:
                 break
                 
-            frame = self.process_frame(frame)
-            cv2.imshow('Camera Gesture Control (Press Q to quit)', frame)
+            self.process_frame(hand_frame)
             
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            if self.preview.quit_requested:
                 # Stop recording if quitting while recording
                 if self.recording:
                     self.recording = False
-                    self.video_writer.release()
-                    print("Recording stopped on exit")
+                    self.recorder.stop()
+                    print(f"Recording stopped on exit: {self.recorder.stats()}")
                 break
         
-        self.cap.release()
-        cv2.destroyAllWindows()
+        # Let queued frames and photos finish encoding before exiting
+        self.preview.close()
+        self.recorder.close()
+        self.source.close()
 
 if __name__ == "__main__":
     control = CameraGestureControl()
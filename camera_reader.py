@@ -0,0 +1,103 @@
+"""
+Threaded low-latency camera reader.
+
+A background thread keeps calling cap.read() and publishes only the newest
+frame, so consumers never wait on the device and never get a frame that sat in
+OpenCV's queue. Three preallocated buffers rotate between the thread and the
+consumer (triple buffering): the camera writes into one, one holds the latest
+frame, and the consumer owns the third until its next read(), so frames are
+never copied and never overwritten while in use.
+"""
+
+import threading
+import time
+
+import cv2
+
+from recording import FrameRateMeter
+
+
+class LatestFrameReader:
+    def __init__(self, camera_index=0, width=None, height=None, buffer_size=1):
+        self.cap = cv2.VideoCapture(camera_index)
+        if width:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        if height:
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        # Ask the driver to keep as few frames queued as it can; not every backend honors it
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+
+        self.buffers = [None, None, None]
+        self.writing, self.latest, self.reading = 0, 1, 2
+        self.latest_seq = 0
+        self.latest_timestamp = 0.0
+        self.consumed_seq = 0
+        self.condition = threading.Condition()
+        self.running = True
+        self.failed = False
+
+        self.camera_rate = FrameRateMeter()
+        self.consumer_rate = FrameRateMeter()
+        self.frames_captured = 0
+        self.frames_consumed = 0
+
+        self.thread = threading.Thread(target=self._run, name='camera-reader', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            while self.running:
+                ok, frame = self.cap.read(self.buffers[self.writing])
+                if not ok:
+                    with self.condition:
+                        self.failed = True
+                        self.condition.notify_all()
+                    return
+                timestamp = time.time()
+                with self.condition:
+                    self.buffers[self.writing] = frame
+                    self.writing, self.latest = self.latest, self.writing
+                    self.latest_seq += 1
+                    self.latest_timestamp = timestamp
+                    self.condition.notify_all()
+                self.frames_captured += 1
+                self.camera_rate.tick(timestamp)
+        finally:
+            # Released here, never from close(): a cap.read() may still be blocked on the device
+            self.cap.release()
+
+    def read(self, timeout=5.0):
+        # Waits for a frame newer than the last one returned. Returns (seq, timestamp, frame) or None
+        # if the camera failed. frame stays valid (and unchanged) until the next read().
+        with self.condition:
+            ready = self.condition.wait_for(
+                lambda: self.failed or not self.running or self.latest_seq > self.consumed_seq, timeout
+            )
+            if not ready or self.latest_seq <= self.consumed_seq:
+                return None
+            self.latest, self.reading = self.reading, self.latest
+            seq = self.consumed_seq = self.latest_seq
+            timestamp = self.latest_timestamp
+            frame = self.buffers[self.reading]
+        self.frames_consumed += 1
+        self.consumer_rate.tick()
+        return seq, timestamp, frame
+
+    def stats(self):
+        return {
+            'camera_fps': round(self.camera_rate.fps, 1),
+            'consumer_fps': round(self.consumer_rate.fps, 1),
+            'frames_captured': self.frames_captured,
+            'frames_consumed': self.frames_consumed,
+            # Newer frames replaced these before anyone read them
+            'frames_skipped': self.frames_captured - self.frames_consumed
+        }
+
+    def close(self):
+        # The capture thread releases the camera once its current read() returns
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        self.thread.join(timeout=1.0)
+        if self.thread.is_alive():
+            print("⚠️ Camera read still blocked; the device is released when it returns")
@@ -0,0 +1,53 @@
+"""
+Where the gesture daemon listens, and the key its clients must hold.
+
+multiprocessing.connection unpickles whatever it receives, so only processes of
+the same user and the same app run may reach the daemon. The socket lives in a
+per-user 0700 directory ($XDG_RUNTIME_DIR/airclick, or a fresh mkdtemp), and
+the auth key is random for every daemon start. app.py creates both with
+new_daemon_env() and passes them to the daemon and the modes through the
+environment. Without them the modes don't look for a daemon at all.
+"""
+
+import os
+import secrets
+import stat
+import sys
+import tempfile
+
+ADDRESS_ENV = 'AIRCLICK_GESTURE_DAEMON_ADDRESS'
+AUTHKEY_ENV = 'AIRCLICK_GESTURE_DAEMON_KEY'
+
+
+def private_runtime_dir():
+    base = os.environ.get('XDG_RUNTIME_DIR')
+    if base and os.path.isdir(base):
+        path = os.path.join(base, 'airclick')
+        try:
+            os.mkdir(path, 0o700)
+        except FileExistsError:
+            pass
+        info = os.lstat(path)
+        # Only reuse it if it really is ours and nobody else can enter it
+        if stat.S_ISDIR(info.st_mode) and info.st_uid == os.getuid() and stat.S_IMODE(info.st_mode) == 0o700:
+            return path
+    # A fresh 0700 directory nobody else can have claimed
+    return tempfile.mkdtemp(prefix='airclick-')
+
+
+def new_daemon_env():
+    # Fresh address and key for one daemon run, as environment variables
+    if sys.platform == 'win32':
+        address = r'\\.\pipe\airclick-gesture-' + secrets.token_hex(16)
+    else:
+        address = os.path.join(private_runtime_dir(), 'gesture.sock')
+    return {ADDRESS_ENV: address, AUTHKEY_ENV: secrets.token_hex(32)}
+
+
+def daemon_endpoint():
+    # (address, authkey) from the environment, or None when no daemon was set up for this process
+    address = os.environ.get(ADDRESS_ENV)
+    key = os.environ.get(AUTHKEY_ENV)
+    if not address or not key:
+        return None
+    return address, bytes.fromhex(key)
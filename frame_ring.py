@@ -0,0 +1,120 @@
+"""
+Shared-memory ring buffer of camera frames.
+
+One producer (the gesture daemon) writes frames into preallocated slots of a
+multiprocessing.shared_memory block; any number of consumer processes attach
+by name and read zero-copy NumPy views. Every slot carries a sequence number
+so readers can tell whether a slot was overwritten while they used it.
+
+Layout: [latest seq][slot seq, slot timestamp] * slots, then the frame slots.
+"""
+
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+
+HEADER_DTYPE = np.dtype([('seq', np.int64), ('timestamp', np.float64)])
+WRITING = -1
+
+# Blocks created by this process; attaching to one of them must not touch the resource tracker
+_created_names = set()
+
+
+class FrameRing:
+    def __init__(self, shm, shape, slots, owner):
+        self.shm = shm
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.owner = owner
+        self.latest = np.ndarray((1,), dtype=np.int64, buffer=shm.buf)
+        self.headers = np.ndarray((slots,), dtype=HEADER_DTYPE, buffer=shm.buf, offset=8)
+        frames_offset = 8 + HEADER_DTYPE.itemsize * slots
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=shm.buf, offset=frames_offset)
+        self.write_seq = int(self.latest[0])
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @classmethod
+    def create(cls, shape, slots=4, name=None):
+        size = 8 + HEADER_DTYPE.itemsize * slots + int(np.prod(shape)) * slots
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _created_names.add(shm.name)
+        ring = cls(shm, shape, slots, owner=True)
+        ring.latest[0] = 0
+        ring.headers['seq'] = 0
+        ring.headers['timestamp'] = 0.0
+        return ring
+
+    @classmethod
+    def attach(cls, name, shape, slots=4):
+        # Only the creator may unlink the block; keep this process's resource tracker from doing it at exit
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=name)
+            if sys.platform != 'win32' and shm.name not in _created_names:
+                from multiprocessing import resource_tracker
+                # Tracked under the POSIX name, which has the leading slash shm.name leaves out
+                resource_tracker.unregister('/' + shm.name.lstrip('/'), 'shared_memory')
+        return cls(shm, shape, slots, owner=False)
+
+    # Producer side
+
+    def begin_write(self):
+        # Writable view of the slot after the latest one; fill it in place, then commit()
+        slot = (self.write_seq + 1) % self.slots
+        self.headers['seq'][slot] = WRITING
+        return self.frames[slot]
+
+    def commit(self, timestamp):
+        self.write_seq += 1
+        slot = self.write_seq % self.slots
+        self.headers['timestamp'][slot] = timestamp
+        self.headers['seq'][slot] = self.write_seq
+        self.latest[0] = self.write_seq
+        return self.write_seq, slot
+
+    # Consumer side
+
+    def slot_for(self, seq):
+        return seq % self.slots
+
+    def is_current(self, seq):
+        # True while the slot holding seq hasn't been overwritten
+        return int(self.headers['seq'][seq % self.slots]) == seq
+
+    def view(self, seq):
+        # Zero-copy, read-only view of frame seq (or None if it is already gone)
+        if not self.is_current(seq):
+            return None
+        frame = self.frames[seq % self.slots]
+        frame = frame.view()
+        frame.flags.writeable = False
+        return frame
+
+    def read_latest(self):
+        seq = int(self.latest[0])
+        if seq == 0:
+            return None
+        frame = self.view(seq)
+        if frame is None:
+            return None
+        return seq, float(self.headers['timestamp'][seq % self.slots]), frame
+
+    def copy_into(self, seq, out):
+        # Copy frame seq into a caller-owned buffer; False if the slot was overwritten during the copy
+        if not self.is_current(seq):
+            return False
+        np.copyto(out, self.frames[seq % self.slots])
+        return self.is_current(seq)
+
+    def close(self):
+        # Drop our views before closing the mapping
+        self.latest = self.headers = self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+            _created_names.discard(self.shm.name)
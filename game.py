@@ -1,15 +1,15 @@
 import pygame
 import random
 import cv2
-import mediapipe as mp
-import time
+import landmark_features
+from gesture_state import GestureStateMachine, PRESS, HOLD
+from hand_source import open_hand_source
 
 # ========== Gesture Setup ==========
-cap = cv2.VideoCapture(0)
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.7)
-jump_gesture_cooldown = 0
-jump_delay = 1.0
+# Landmarks only: the game never shows the camera image
+source = open_hand_source(frames=False, max_num_hands=1, min_detection_confidence=0.7)
+# Jump when the open hand appears; keeping it open jumps again every second
+gestures = GestureStateMachine(press_ms=60, release_ms=150, hold_ms=1000, repeat_ms=1000)
 
 # ========== Game Setup ==========
 pygame.init()
@@ -41,15 +41,10 @@ score = 0
 game_over = False
 
 # Gesture detection
-def is_jump_gesture(landmarks):
-    if not landmarks:
+def is_jump_gesture(points):
+    if points is None:
         return False
-    fingers = []
-    tips = [8, 12, 16, 20]
-    fingers.append(1 if landmarks[4].x < landmarks[3].x else 0)  # Thumb
-    for tip in tips:
-        fingers.append(1 if landmarks[tip].y < landmarks[tip - 2].y else 0)
-    return sum(fingers) == 5  # Full hand open
+    return bool(landmark_features.fingers_extended(points).all())  # Full hand open
 
 # ========== Game Loop ==========
 running = True
@@ -57,19 +52,14 @@ while running:
     win.fill(WHITE)
 
     # Check gesture input
-    ret, frame = cap.read()
-    if not ret: break
-    frame = cv2.flip(frame, 1)
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = hands.process(rgb)
-    now = time.time()
-
-    if results.multi_hand_landmarks:
-        lmList = results.multi_hand_landmarks[0].landmark
-        if is_jump_gesture(lmList) and not jumping and now - jump_gesture_cooldown > jump_delay:
+    hand_frame = source.read()
+    if hand_frame is None: break
+
+    points = hand_frame.hands[0] if len(hand_frame.hands) else None
+    for event in gestures.update('jump' if is_jump_gesture(points) else None, hand_frame.timestamp):
+        if event.kind in (PRESS, HOLD) and not jumping:
             velocity = -12
             jumping = True
-            jump_gesture_cooldown = now
 
     # Dino jump physics
     velocity += gravity
@@ -123,6 +113,6 @@ while running:
         if event.type == pygame.QUIT:
             running = False
 
-cap.release()
+source.close()
 pygame.quit()
 cv2.destroyAllWindows()
\ No newline at end of file
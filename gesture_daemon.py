@@ -0,0 +1,173 @@
+"""
+Gesture daemon: one long-lived process that owns the camera and the MediaPipe
+model and streams landmarks to the mode scripts over a local socket.
+
+app.py starts it once and keeps it running across mode switches. Modes connect
+through hand_source.open_hand_source(), using the private socket address and
+auth key app.py passes to both (see daemon_auth.py).
+"""
+
+import argparse
+import os
+import sys
+import threading
+from multiprocessing.connection import Listener
+
+import numpy as np
+
+from daemon_auth import ADDRESS_ENV, AUTHKEY_ENV, daemon_endpoint, new_daemon_env
+from frame_ring import FrameRing
+from hand_source import LocalHandSource, connect_daemon
+
+
+class GestureDaemon:
+    def __init__(self, address, authkey, camera_index=0, width=640, height=480, ring_slots=4, **hands_options):
+        self.address = address
+        self.authkey = authkey
+        self.source = LocalHandSource(camera_index, width, height, **hands_options)
+        # Reported to each mode on connect so it can warn when it asked for something else
+        self.options = {'camera_index': camera_index, 'width': width, 'height': height, **hands_options}
+        # Frames live in shared memory; clients only receive landmarks plus the ring slot to read
+        self.ring_slots = ring_slots
+        self.ring = None
+        self.condition = threading.Condition()
+        self.latest = None
+        self.latest_frame_seq = 0
+        self.clients = 0
+        self.running = True
+        self.listener = None
+
+    def capture_loop(self):
+        while self.running:
+            # Keep the camera warm with no clients, but only pay for inference when someone listens
+            detect = self.clients > 0
+            if self.ring is None:
+                hand_frame = self.source.read(detect=detect)
+                if hand_frame is not None:
+                    # The real frame size is only known once the camera delivers one
+                    self.ring = FrameRing.create(hand_frame.frame.shape, self.ring_slots)
+                    np.copyto(self.ring.begin_write(), hand_frame.frame)
+            else:
+                hand_frame = self.source.read(detect=detect, out=self.ring.begin_write())
+            if hand_frame is not None:
+                frame_seq, _ = self.ring.commit(hand_frame.timestamp)
+            if hand_frame is None:
+                print("❌ Failed to read frame")
+                self.running = False
+                # Wake the blocked accept() so the daemon exits instead of serving a dead camera
+                poke = connect_daemon(endpoint=(self.address, self.authkey))
+                if poke is not None:
+                    poke.close()
+            with self.condition:
+                if hand_frame is not None:
+                    self.latest = hand_frame
+                    self.latest_frame_seq = frame_seq
+                self.condition.notify_all()
+
+    def serve_client(self, conn):
+        with self.condition:
+            self.clients += 1
+        print(f"✅ Mode connected. Total clients: {self.clients}")
+        try:
+            while self.running:
+                request = conn.recv()
+                if request[0] == 'options':
+                    conn.send(self.options)
+                    continue
+                _, last_seq, want_frame = request
+                with self.condition:
+                    self.condition.wait_for(
+                        lambda: not self.running or (self.latest is not None and self.latest.seq > last_seq)
+                    )
+                    hand_frame = self.latest
+                    frame_seq = self.latest_frame_seq
+                if not self.running:
+                    break
+                packet = {
+                    'seq': hand_frame.seq,
+                    'timestamp': hand_frame.timestamp,
+                    'hands': hand_frame.hands
+                }
+                if want_frame:
+                    packet['frame_seq'] = frame_seq
+                    packet['ring'] = (self.ring.name, self.ring.shape, self.ring.slots)
+                conn.send(packet)
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+            with self.condition:
+                self.clients -= 1
+            print(f"❌ Mode disconnected. Total clients: {self.clients}")
+
+    def serve_forever(self):
+        if sys.platform != 'win32' and os.path.exists(self.address):
+            # Left behind by a daemon that didn't shut down cleanly
+            os.unlink(self.address)
+        self.listener = Listener(self.address, authkey=self.authkey)
+        threading.Thread(target=self.capture_loop, daemon=True).start()
+        try:
+            while self.running:
+                try:
+                    conn = self.listener.accept()
+                except OSError:
+                    break
+                if not self.running:
+                    conn.close()
+                    break
+                threading.Thread(target=self.serve_client, args=(conn,), daemon=True).start()
+        finally:
+            self.running = False
+            with self.condition:
+                self.condition.notify_all()
+            self.listener.close()
+            self.source.close()
+            if self.ring is not None:
+                self.ring.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared camera + hand landmark daemon for the gesture modes")
+    parser.add_argument('--camera', type=int, default=0)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--max-hands', type=int, default=1)
+    parser.add_argument('--min-detection-confidence', type=float, default=0.7)
+    parser.add_argument('--min-tracking-confidence', type=float, default=0.5)
+    args = parser.parse_args()
+
+    endpoint = daemon_endpoint()
+    if endpoint is None:
+        # Started by hand: make a private address and key, and say how to point modes at it
+        env = new_daemon_env()
+        os.environ.update(env)
+        endpoint = daemon_endpoint()
+        print("🔑 Run modes with these set to use this daemon:")
+        for name in (ADDRESS_ENV, AUTHKEY_ENV):
+            print(f"   {name}={env[name]}")
+
+    existing = connect_daemon(endpoint=endpoint)
+    if existing is not None:
+        existing.close()
+        print("ℹ️ Gesture daemon is already running")
+        return
+
+    print("🚀 Starting gesture daemon...")
+    daemon = GestureDaemon(
+        *endpoint,
+        camera_index=args.camera,
+        width=args.width,
+        height=args.height,
+        max_num_hands=args.max_hands,
+        min_detection_confidence=args.min_detection_confidence,
+        min_tracking_confidence=args.min_tracking_confidence
+    )
+    print(f"📡 Listening on {daemon.address}")
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Gesture daemon stopped by user")
+
+
+if __name__ == "__main__":
+    main()
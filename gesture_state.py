@@ -0,0 +1,96 @@
+"""
+Time-based gesture state machine shared by the server and every gesture mode.
+
+Each frame reports which gesture it sees (any hashable label, or None) with a
+timestamp in seconds and an optional confidence. The machine turns that into
+debounced PRESS / HOLD / RELEASE events using millisecond thresholds, so a
+gesture feels the same at 10 fps as at 30 fps:
+
+  - PRESS once the gesture has been seen continuously for press_ms, at
+    press_confidence or better, and cooldown_ms after the last press of it
+  - HOLD after hold_ms held, then every repeat_ms if repeat_ms is set
+  - RELEASE once the gesture has been missing for release_ms
+
+While a gesture is active, frames at release_confidence or better still count
+as seeing it (hysteresis), so a wobbling score doesn't release and re-press.
+"""
+
+from collections import namedtuple
+
+PRESS = 'press'
+HOLD = 'hold'
+RELEASE = 'release'
+
+# duration_ms: how long the gesture had been held when the event fired
+GestureEvent = namedtuple('GestureEvent', ['kind', 'gesture', 'timestamp', 'duration_ms'])
+
+
+def _elapsed_ms(start, end):
+    # Small slack so 0.9 -> 1.0 counts as the full 100 ms despite float rounding
+    return (end - start) * 1000 + 1e-6
+
+
+class GestureStateMachine:
+    def __init__(self, press_ms=100, release_ms=100, hold_ms=None, repeat_ms=None, cooldown_ms=0,
+                 press_confidence=0.0, release_confidence=0.0):
+        self.press_ms = press_ms
+        self.release_ms = release_ms
+        self.hold_ms = hold_ms
+        self.repeat_ms = repeat_ms
+        self.cooldown_ms = cooldown_ms
+        self.press_confidence = press_confidence
+        self.release_confidence = min(release_confidence, press_confidence)
+        self.last_press = {}
+        self.reset()
+
+    def reset(self):
+        self.active = None
+        self.pressed_at = None
+        self.last_seen = None
+        self.next_hold = None
+        self.candidate = None
+        self.candidate_since = None
+
+    def held_ms(self, timestamp):
+        # How long the active gesture has been held, 0 when nothing is active
+        if self.active is None:
+            return 0.0
+        return (timestamp - self.pressed_at) * 1000
+
+    def update(self, gesture, timestamp, confidence=1.0):
+        # Returns the GestureEvents this frame produced, oldest first
+        events = []
+        if self.active is not None:
+            if gesture == self.active and confidence >= self.release_confidence:
+                self.last_seen = timestamp
+            elif _elapsed_ms(self.last_seen, timestamp) >= self.release_ms:
+                events.append(GestureEvent(RELEASE, self.active, timestamp, self.held_ms(self.last_seen)))
+                self.reset()
+            if self.active is not None:
+                if self.next_hold is not None and timestamp >= self.next_hold:
+                    events.append(GestureEvent(HOLD, self.active, timestamp, self.held_ms(timestamp)))
+                    self.next_hold = timestamp + self.repeat_ms / 1000 if self.repeat_ms else None
+                return events
+
+        if gesture is None or confidence < self.press_confidence:
+            self.candidate = None
+            return events
+        if gesture != self.candidate:
+            self.candidate = gesture
+            self.candidate_since = timestamp
+        last_press = self.last_press.get(gesture)
+        cooled_down = last_press is None or _elapsed_ms(last_press, timestamp) >= self.cooldown_ms
+        if _elapsed_ms(self.candidate_since, timestamp) >= self.press_ms and cooled_down:
+            self.active = gesture
+            self.pressed_at = timestamp
+            self.last_seen = timestamp
+            self.next_hold = timestamp + self.hold_ms / 1000 if self.hold_ms is not None else None
+            self.candidate = None
+            self.last_press[gesture] = timestamp
+            events.append(GestureEvent(PRESS, gesture, timestamp, 0.0))
+        return events
+
+
+def pressed(events, gesture=None):
+    # True if events contain a PRESS (of gesture, when given)
+    return any(event.kind == PRESS and (gesture is None or event.gesture == gesture) for event in events)
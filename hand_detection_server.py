@@ -5,163 +5,829 @@ import asyncio
 import websockets
 import json
 import base64
+import struct
 import time
+import os
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import landmark_features
+from inference_engine import AdaptiveHandTracker
+from latency_stats import LatencyStats
+from gesture_state import GestureStateMachine
 
-class HandGestureDetector:
+# Binary video frame message: fixed little-endian header followed by the encoded image bytes.
+# version, codec, frame id, capture timestamp (ms), width, height
+FRAME_HEADER = struct.Struct('<BBIdHH')
+FRAME_PROTOCOL_VERSION = 1
+# Version 2 appends the browser's canvas draw and JPEG encode durations (ms) to the version 1 header
+FRAME_HEADER_V2 = struct.Struct('<BBIdHHff')
+FRAME_PROTOCOL_VERSION_TIMED = 2
+CODEC_JPEG = 1
+CODEC_WEBP = 2
+SUPPORTED_CODECS = (CODEC_JPEG, CODEC_WEBP)
+
+# Binary detection result: fixed header optionally followed by 21x3 int16 landmarks.
+# version, flags, frame id, capture timestamp (ms), confidence, consecutive fist frames, no-fist frames
+RESULT_HEADER = struct.Struct('<BBIdfBB')
+RESULT_PROTOCOL_VERSION = 1
+RESULT_FLAG_HAND = 1
+RESULT_FLAG_FIST = 2
+RESULT_FLAG_LANDMARKS = 4
+RESULT_FLAG_DELTA = 8
+RESULT_FORMATS = ('json', 'compact', 'binary')
+# Quantized landmark units per normalized image coordinate (int16 covers roughly -3.2..3.2)
+LANDMARK_SCALE = 10000
+
+# Legacy stability_frames settings are converted to milliseconds at the browser's 20 fps cap
+LEGACY_FRAME_MS = 50
+
+# Frames a flow-controlled client may have in flight: one in inference plus one waiting in its
+# LatestFrameSlot, so nothing it sends is ever dropped unseen. Each result (or frame_credit) returns one.
+FLOW_CONTROL_CREDITS = 2
+
+class FrameDecodeError(ValueError):
+    pass
+
+def decode_binary_frame(message):
+    version = message[0] if message else None
+    header = FRAME_HEADER_V2 if version == FRAME_PROTOCOL_VERSION_TIMED else FRAME_HEADER
+    if len(message) <= header.size:
+        raise FrameDecodeError(f"Binary frame too short: {len(message)} bytes")
+    if version not in (FRAME_PROTOCOL_VERSION, FRAME_PROTOCOL_VERSION_TIMED):
+        raise FrameDecodeError(f"Unsupported frame protocol version: {version}")
+    fields = header.unpack_from(message)
+    _, codec, frame_id, capture_ts, width, height = fields[:6]
+    if codec not in SUPPORTED_CODECS:
+        raise FrameDecodeError(f"Unsupported frame codec: {codec}")
+    # View over the payload without copying it out of the message
+    payload = np.frombuffer(message, dtype=np.uint8, offset=header.size)
+    frame = cv2.imdecode(payload, cv2.IMREAD_COLOR)
+    meta = {
+        'frame_id': frame_id,
+        'capture_ts': capture_ts,
+        'width': width,
+        'height': height
+    }
+    if version == FRAME_PROTOCOL_VERSION_TIMED:
+        meta['capture_ms'], meta['encode_ms'] = fields[6:]
+    return frame, meta
+
+def decode_json_frame(data):
+    # Legacy clients send a data:image/jpeg;base64,... URL inside a JSON message
+    image_data = base64.b64decode(data['frame'].split(',', 1)[1])
+    nparr = np.frombuffer(image_data, np.uint8)
+    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    meta = {}
+    if 'frame_id' in data:
+        meta['frame_id'] = data['frame_id']
+    if 'capture_ts' in data:
+        meta['capture_ts'] = data['capture_ts']
+    return frame, meta
+
+class LatestFrameSlot:
+    # Single-slot ingest buffer: a newer frame always replaces one that hasn't been picked up yet
     def __init__(self):
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=False,
-            max_num_hands=1,
-            min_detection_confidence=0.7,  # Increased from 0.5 for better accuracy
-            min_tracking_confidence=0.5,   # Increased from 0.4 for better tracking
-            model_complexity=1             # Increased from 0 for better accuracy
+        self.pending = None
+        self.ready = asyncio.Event()
+        self.received_frames = 0
+        self.dropped_frames = 0
+        self.processed_frames = 0
+        self.last_queue_age = 0.0
+        self.max_queue_age = 0.0
+        self.total_queue_age = 0.0
+
+    def put(self, kind, payload):
+        if self.pending is not None:
+            self.dropped_frames += 1
+        self.received_frames += 1
+        self.pending = (kind, payload, time.perf_counter(), time.time() * 1000)
+        self.ready.set()
+
+    async def get(self):
+        # Returns (kind, payload, wall-clock receive time in ms)
+        while self.pending is None:
+            self.ready.clear()
+            await self.ready.wait()
+        kind, payload, received_at, received_ts = self.pending
+        self.pending = None
+        queue_age = time.perf_counter() - received_at
+        self.last_queue_age = queue_age
+        self.max_queue_age = max(self.max_queue_age, queue_age)
+        self.total_queue_age += queue_age
+        self.processed_frames += 1
+        return kind, payload, received_ts
+
+    def stats(self):
+        avg_queue_age = self.total_queue_age / self.processed_frames if self.processed_frames else 0.0
+        return {
+            'received_frames': self.received_frames,
+            'dropped_frames': self.dropped_frames,
+            'processed_frames': self.processed_frames,
+            'last_queue_age_ms': round(self.last_queue_age * 1000, 2),
+            'avg_queue_age_ms': round(avg_queue_age * 1000, 2),
+            'max_queue_age_ms': round(self.max_queue_age * 1000, 2)
+        }
+
+def create_hands(model_complexity=1):
+    return mp.solutions.hands.Hands(
+        static_image_mode=False,
+        max_num_hands=1,
+        min_detection_confidence=0.7,  # Increased from 0.5 for better accuracy
+        min_tracking_confidence=0.5,   # Increased from 0.4 for better tracking
+        model_complexity=model_complexity
+    )
+
+INFERENCE_SIZE = (160, 120)
+
+# Quality tiers the QualityController moves between, cheapest first: (width, height, model_complexity)
+QUALITY_TIERS = (
+    (128, 96, 0),
+    (160, 120, 0),
+    (160, 120, 1),
+    (256, 192, 1)
+)
+DEFAULT_TIER = 2  # INFERENCE_SIZE with model_complexity=1, the fixed setting before tiers existed
+
+class QualityController:
+    # Feedback loop over per-frame inference time: steps down a tier while the smoothed latency is over
+    # budget and steps up when there is clear headroom. hold_frames keeps each tier long enough to measure it.
+    # (MediaPipe Hands only reports a handedness score, which says nothing about landmark quality, so
+    # detection confidence isn't used.)
+    def __init__(self, latency_budget=0.030, tiers=QUALITY_TIERS, start_tier=DEFAULT_TIER, enabled=True,
+                 smoothing=0.2, hold_frames=30):
+        self.latency_budget = latency_budget
+        self.tiers = tiers
+        self.tier = start_tier
+        self.enabled = enabled
+        self.smoothing = smoothing
+        self.hold_frames = hold_frames
+        self.latency = None
+        self.frames_since_change = 0
+        self.tier_changes = 0
+
+    @property
+    def size(self):
+        width, height, _ = self.tiers[self.tier]
+        return width, height
+
+    @property
+    def model_complexity(self):
+        return self.tiers[self.tier][2]
+
+    def _smooth(self, previous, value):
+        if previous is None:
+            return value
+        return previous + self.smoothing * (value - previous)
+
+    def observe(self, latency):
+        # latency: inference seconds of one frame. Returns True when the tier changed
+        self.latency = self._smooth(self.latency, latency)
+        self.frames_since_change += 1
+        if not self.enabled or self.frames_since_change < self.hold_frames:
+            return False
+
+        tier = self.tier
+        if self.latency > self.latency_budget and tier > 0:
+            tier -= 1
+        elif tier < len(self.tiers) - 1 and self.latency < self.latency_budget * 0.5:
+            tier += 1
+        if tier == self.tier:
+            return False
+        self.tier = tier
+        self.tier_changes += 1
+        self.frames_since_change = 0
+        # The new tier is measured from scratch
+        self.latency = None
+        return True
+
+    def info(self):
+        width, height = self.size
+        return {
+            'tier': self.tier,
+            'tiers': len(self.tiers),
+            'width': width,
+            'height': height,
+            'model_complexity': self.model_complexity,
+            'latency_budget_ms': round(self.latency_budget * 1000, 2),
+            'adaptive': self.enabled
+        }
+
+    def stats(self):
+        return {
+            **self.info(),
+            'smoothed_latency_ms': round(self.latency * 1000, 2) if self.latency is not None else None,
+            'tier_changes': self.tier_changes
+        }
+
+def preprocess_frame(kind, payload, size=INFERENCE_SIZE):
+    # Decode one frame, resize it to the inference size and convert BGR->RGB.
+    # Returns (rgb or None if decoding failed, meta); meta gets stage_ms with its decode and resize time.
+    started = time.perf_counter()
+    if kind == 'binary':
+        frame, meta = decode_binary_frame(payload)
+    else:
+        frame, meta = decode_json_frame(payload)
+    meta['stage_ms'] = {'decode': (time.perf_counter() - started) * 1000}
+    if frame is None:
+        meta['decode_failed'] = True
+        return None, meta
+    started = time.perf_counter()
+    rgb_frame = cv2.cvtColor(cv2.resize(frame, size), cv2.COLOR_BGR2RGB)
+    meta['stage_ms']['resize'] = (time.perf_counter() - started) * 1000
+    return rgb_frame, meta
+
+class HandsPool:
+    # Reusable MediaPipe Hands instances; a session leases one so its tracking state stays its own.
+    # Instances are kept per model_complexity, since that is fixed when a Hands graph is built.
+    def __init__(self, idle_ttl=120.0):
+        self.idle_ttl = idle_ttl
+        self.idle = []
+        self.lock = threading.Lock()
+        self.created = 0
+
+    def acquire(self, model_complexity=1):
+        with self.lock:
+            for i, (hands, complexity, _) in enumerate(self.idle):
+                if complexity == model_complexity:
+                    del self.idle[i]
+                    return hands
+            self.created += 1
+        return create_hands(model_complexity)
+
+    def release(self, hands, model_complexity=1):
+        # Forget the previous session's hand so the next lease starts with palm detection
+        hands.reset()
+        with self.lock:
+            self.idle.append((hands, model_complexity, time.monotonic()))
+
+    def evict_idle(self):
+        cutoff = time.monotonic() - self.idle_ttl
+        with self.lock:
+            expired = [hands for hands, _, released_at in self.idle if released_at < cutoff]
+            self.idle = [entry for entry in self.idle if entry[2] >= cutoff]
+        for hands in expired:
+            hands.close()
+        return len(expired)
+
+    def close(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for hands, _, _ in idle:
+            hands.close()
+
+    def stats(self):
+        with self.lock:
+            return {'created': self.created, 'idle': len(self.idle)}
+
+class InferencePool:
+    # Decode + MediaPipe inference on worker threads, using the Hands instance of the calling session.
+    # Callers await one frame at a time per session, which keeps per-session frames in order.
+    def __init__(self, workers=2):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix='inference'
         )
+
+    def _infer_rgb(self, detector, rgb_frame, model_complexity):
+        # Returns (points or None, inference ms or None for a skipped frame).
+        # Inference is hands.process alone; leasing or rebuilding a Hands for the tier is not counted.
+        with detector.hands_lock:
+            detector.use_model_complexity(model_complexity)
+            points = detector.tracker.process_rgb(rgb_frame)
+            inference_ms = detector.tracker.inference_ms
+        if not len(points):
+            return None, inference_ms
+        return points[0], inference_ms
+
+    def process_frame(self, detector, kind, payload, size=INFERENCE_SIZE, model_complexity=1, queued_at=None):
+        # One frame end to end on a worker: decode, resize, inference and the fist rules.
+        # Returns (points or None, is_fist, meta); meta carries the frame header fields and stage_ms.
+        # queued_at: perf_counter() when the frame was handed to the scheduler, for the worker_wait stage.
+        started = time.perf_counter()
+        rgb_frame, meta = preprocess_frame(kind, payload, size)
+        if queued_at is not None:
+            # Time spent waiting for a free inference worker
+            meta['stage_ms']['worker_wait'] = (started - queued_at) * 1000
+        if rgb_frame is None:
+            return None, False, meta
+        points, inference_ms = self._infer_rgb(detector, rgb_frame, model_complexity)
+        if inference_ms is not None:
+            meta['stage_ms']['inference'] = inference_ms
+        started = time.perf_counter()
+        is_fist = points is not None and bool(landmark_features.is_fist(points))
+        meta['stage_ms']['classify'] = (time.perf_counter() - started) * 1000
+        return points, is_fist, meta
+
+    async def run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+class TierScheduler:
+    # Runs each frame on the inference pool at the controller's quality tier, read when the frame is
+    # submitted, and feeds the frame's inference time back into the controller. Frames are not batched:
+    # MediaPipe keeps per-session tracking state and decode/resize are per frame, so there is no work
+    # to share and a collection window would only add waiting.
+    def __init__(self, inference_pool, controller=None, on_tier_change=None):
+        self.inference_pool = inference_pool
+        self.controller = controller or QualityController(enabled=False)
+        self.on_tier_change = on_tier_change
+        self.frames = 0
+
+    async def submit(self, detector, kind, payload):
+        size = self.controller.size
+        model_complexity = self.controller.model_complexity
+        points, is_fist, meta = await self.inference_pool.run(
+            self.inference_pool.process_frame, detector, kind, payload, size, model_complexity,
+            time.perf_counter()
+        )
+        self.frames += 1
+        # Frames the tracker skipped ran no inference and say nothing about the tier's cost
+        inference_ms = meta['stage_ms'].get('inference')
+        if inference_ms is not None:
+            self._observe(inference_ms / 1000)
+        return points, is_fist, meta
+
+    def _observe(self, latency):
+        if self.controller.observe(latency) and self.on_tier_change:
+            self.on_tier_change(self.controller.info())
+
+    def stats(self):
+        return {
+            'scheduled_frames': self.frames,
+            'quality': self.controller.stats()
+        }
+
+class HandGestureDetector:
+    def __init__(self, hands_pool=None):
+        self.mp_hands = mp.solutions.hands
+        self.hands_pool = hands_pool
+        self._hands = None
+        self._tracker = None
+        self.model_complexity = 1
+        # Held while a worker runs inference so the Hands can't be released mid-frame
+        self.hands_lock = threading.Lock()
         self.mp_draw = mp.solutions.drawing_utils
+        # Time-based debounce: a fist must last press_ms to count and be gone release_ms to let go,
+        # whatever rate the client sends frames at. (MediaPipe gives no fist confidence to gate on:
+        # its handedness score only says how sure it is which hand it sees.)
+        self.gestures = GestureStateMachine(
+            press_ms=3 * LEGACY_FRAME_MS,
+            release_ms=2 * LEGACY_FRAME_MS
+        )
+        # Reported to clients for display only (the binary result header has fields for them)
         self.consecutive_fist_frames = 0
-        self.required_fist_frames = 3      # Increased from 1 for more stable detection
         self.consecutive_no_fist_frames = 0
-        self.required_no_fist_frames = 2   # Prevent false positives
 
-    def detect_fist(self, landmarks):
-        if not landmarks:
+    def configure_gestures(self, settings):
+        # Returns True when a threshold changed
+        changed = False
+        if 'stability_frames' in settings:
+            self.gestures.press_ms = int(settings['stability_frames']) * LEGACY_FRAME_MS
+            changed = True
+        for key in ('press_ms', 'release_ms'):
+            if key in settings:
+                setattr(self.gestures, key, float(settings[key]))
+                changed = True
+        return changed
+
+    def detect_fist(self, points):
+        if points is None:
             return False
-        
-        # More precise finger detection with better thresholds
-        # Index finger (8) should be below middle joint (6)
-        index_folded = landmarks[8].y > landmarks[6].y + 0.02
-        
-        # Middle finger (12) should be below middle joint (10)
-        middle_folded = landmarks[12].y > landmarks[10].y + 0.02
-        
-        # Ring finger (16) should be below middle joint (14)
-        ring_folded = landmarks[16].y > landmarks[14].y + 0.02
-        
-        # Pinky finger (20) should be below middle joint (18)
-        pinky_folded = landmarks[20].y > landmarks[18].y + 0.02
-        
-        # Thumb should be close to index finger base (thumb tip 4 near index base 5)
-        thumb_distance = np.sqrt(
-            (landmarks[4].x - landmarks[5].x)**2 + 
-            (landmarks[4].y - landmarks[5].y)**2
-        )
-        thumb_folded = thumb_distance < 0.15
-        
-        # Additional check: all fingertips should be below their respective middle joints
-        fingertips_below = (
-            landmarks[8].y > landmarks[5].y and  # Index tip below base
-            landmarks[12].y > landmarks[9].y and  # Middle tip below base
-            landmarks[16].y > landmarks[13].y and # Ring tip below base
-            landmarks[20].y > landmarks[17].y     # Pinky tip below base
-        )
-        
-        # All conditions must be met for a proper fist
-        all_folded = (index_folded and middle_folded and ring_folded and 
-                     pinky_folded and thumb_folded and fingertips_below)
-        
-        return all_folded
+        return bool(landmark_features.is_fist(points))
+
+    @property
+    def hands(self):
+        # Leased (or created) on first use and kept until release_hands()
+        if self._hands is None:
+            if self.hands_pool:
+                self._hands = self.hands_pool.acquire(self.model_complexity)
+            else:
+                self._hands = create_hands(self.model_complexity)
+        return self._hands
+
+    @property
+    def tracker(self):
+        # Frames already arrive at the quality tier size, so only the stationary skips apply
+        if self._tracker is None:
+            self._tracker = AdaptiveHandTracker(self.hands, infer_width=None)
+        return self._tracker
+
+    def use_model_complexity(self, model_complexity):
+        # Called with hands_lock held; the next frame leases a Hands built for the new complexity
+        if model_complexity != self.model_complexity:
+            self._release_hands()
+            self.model_complexity = model_complexity
+
+    def release_hands(self):
+        with self.hands_lock:
+            self._release_hands()
 
-    def process_frame(self, frame):
-        small_frame = cv2.resize(frame, (160, 120))
-        rgb_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(rgb_frame)
+    def _release_hands(self):
+        if self._hands is None:
+            return
+        if self.hands_pool:
+            self.hands_pool.release(self._hands, self.model_complexity)
+        else:
+            self._hands.close()
+        self._hands = None
+        self._tracker = None
+
+    def classify(self, points, is_fist=None, timestamp=None):
+        # timestamp: frame time in seconds (defaults to now)
         detection_result = {
             'hand_detected': False,
             'fist_detected': False,
-            'landmarks': [],
+            'landmarks': None,
             'confidence': 0.0,
             'debug_info': 'No hand detected'
         }
+        timestamp = time.time() if timestamp is None else timestamp
+        if points is not None and is_fist is None:
+            is_fist = self.detect_fist(points)
+        # A lost hand counts as no fist, so the fist releases instead of sticking
+        events = self.gestures.update('fist' if points is not None and is_fist else None, timestamp)
         
-        if results.multi_hand_landmarks:
-            hand_landmarks = results.multi_hand_landmarks[0]
-            landmarks = hand_landmarks.landmark
-            is_fist = self.detect_fist(landmarks)
-            
-            # Improved stability logic
+        if points is not None:
             if is_fist:
                 self.consecutive_fist_frames += 1
                 self.consecutive_no_fist_frames = 0
             else:
+                self.consecutive_fist_frames = 0
                 self.consecutive_no_fist_frames += 1
-                # Only reset fist frames if we've seen no fist for required frames
-                if self.consecutive_no_fist_frames >= self.required_no_fist_frames:
-                    self.consecutive_fist_frames = 0
             
-            # More stable detection: require consecutive frames for both detection and release
-            stable_fist = self.consecutive_fist_frames >= self.required_fist_frames
+            stable_fist = self.gestures.active == 'fist'
             
             detection_result['hand_detected'] = True
             detection_result['fist_detected'] = stable_fist
-            detection_result['landmarks'] = [
-                {'x': lm.x, 'y': lm.y, 'z': lm.z} for lm in landmarks
-            ]
+            # Kept as a (21, 3) array; each client's ResultEncoder decides how to serialize it
+            detection_result['landmarks'] = points
             # Higher confidence for stable detection
             detection_result['confidence'] = 0.95 if stable_fist else 0.6
             detection_result['consecutive_frames'] = self.consecutive_fist_frames
             detection_result['no_fist_frames'] = self.consecutive_no_fist_frames
+            detection_result['fist_held_ms'] = round(self.gestures.held_ms(timestamp), 1)
             detection_result['debug_info'] = f'Hand detected - Fist: {is_fist}, Stable: {stable_fist}'
         else:
             detection_result['debug_info'] = 'No hand landmarks found'
+        if events:
+            detection_result['gesture_events'] = [
+                {'kind': event.kind, 'gesture': event.gesture, 'timestamp': event.timestamp,
+                 'duration_ms': round(event.duration_ms, 1)}
+                for event in events
+            ]
             
-        return detection_result, small_frame
+        return detection_result
+
+def quantize_landmarks(points):
+    return np.round(np.clip(points, -3.2, 3.2) * LANDMARK_SCALE).astype(np.int16)
+
+class ResultEncoder:
+    # Per-session result encoding, negotiated through update_settings:
+    #   result_format: 'json' (legacy dicts), 'compact' (flat quantized JSON) or 'binary' (RESULT_HEADER + int16)
+    #   include_landmarks: False when the client only needs fist_detected (any format)
+    #   delta_landmarks: send landmark deltas against the previous frame, with periodic keyframes
+    #                    (compact and binary only; JSON results always carry absolute landmarks)
+    def __init__(self, keyframe_interval=30):
+        self.result_format = 'json'
+        self.include_landmarks = True
+        self.delta_landmarks = False
+        self.keyframe_interval = keyframe_interval
+        self.previous = None
+        self.frames_since_keyframe = 0
+
+    def configure(self, settings):
+        changed = False
+        if settings.get('result_format') in RESULT_FORMATS:
+            self.result_format = settings['result_format']
+            changed = True
+        if 'include_landmarks' in settings:
+            self.include_landmarks = bool(settings['include_landmarks'])
+            changed = True
+        if 'delta_landmarks' in settings:
+            self.delta_landmarks = bool(settings['delta_landmarks'])
+            changed = True
+        if self.delta_landmarks and self.result_format == 'json':
+            print("⚠️ delta_landmarks needs result_format 'compact' or 'binary'; JSON results stay absolute")
+            self.delta_landmarks = False
+        if changed:
+            # Restart the delta chain so the client never applies a delta to a stale base
+            self.previous = None
+        return changed
+
+    def _encode_landmarks(self, points):
+        # Returns (int16 values, is_delta) or (None, False) when landmarks are omitted
+        if not self.include_landmarks or points is None:
+            self.previous = None
+            return None, False
+        quantized = quantize_landmarks(points).reshape(-1)
+        if not self.delta_landmarks:
+            return quantized, False
+        if self.previous is not None and self.frames_since_keyframe < self.keyframe_interval:
+            delta = quantized.astype(np.int32) - self.previous
+            if np.abs(delta).max() <= np.iinfo(np.int16).max:
+                self.previous = quantized.astype(np.int32)
+                self.frames_since_keyframe += 1
+                return delta.astype(np.int16), True
+        self.previous = quantized.astype(np.int32)
+        self.frames_since_keyframe = 0
+        return quantized, False
+
+    def encode(self, detection_result):
+        if self.result_format == 'binary':
+            return self._encode_binary(detection_result)
+        if self.result_format == 'compact':
+            return self._encode_compact(detection_result)
+        return encode_json_result(detection_result, include_landmarks=self.include_landmarks)
+
+    def _encode_compact(self, detection_result):
+        values, is_delta = self._encode_landmarks(detection_result.get('landmarks'))
+        data = {
+            key: detection_result[key] for key in (
+                'hand_detected', 'fist_detected', 'confidence', 'consecutive_frames',
+                'no_fist_frames', 'frame_id', 'capture_ts'
+            ) if key in detection_result
+        }
+        if values is not None:
+            data['landmarks_q'] = values.tolist()
+            data['landmark_scale'] = LANDMARK_SCALE
+            data['landmarks_delta'] = is_delta
+        return json.dumps({'type': 'gesture_detection', 'data': data}, separators=(',', ':'))
+
+    def _encode_binary(self, detection_result):
+        values, is_delta = self._encode_landmarks(detection_result.get('landmarks'))
+        flags = 0
+        if detection_result['hand_detected']:
+            flags |= RESULT_FLAG_HAND
+        if detection_result['fist_detected']:
+            flags |= RESULT_FLAG_FIST
+        if values is not None:
+            flags |= RESULT_FLAG_LANDMARKS
+        if is_delta:
+            flags |= RESULT_FLAG_DELTA
+        header = RESULT_HEADER.pack(
+            RESULT_PROTOCOL_VERSION,
+            flags,
+            detection_result.get('frame_id', 0) & 0xFFFFFFFF,
+            detection_result.get('capture_ts', 0.0),
+            detection_result['confidence'],
+            min(detection_result.get('consecutive_frames', 0), 255),
+            min(detection_result.get('no_fist_frames', 0), 255)
+        )
+        if values is None:
+            return header
+        return header + values.astype('<i2').tobytes()
+
+def encode_json_result(detection_result, include_landmarks=True, **extra):
+    data = dict(detection_result)
+    points = data.pop('landmarks', None)
+    if include_landmarks:
+        data['landmarks'] = [] if points is None else [
+            {'x': float(x), 'y': float(y), 'z': float(z)} for x, y, z in points
+        ]
+    return json.dumps({'type': 'gesture_detection', **extra, 'data': data})
+
+class ClientChannel:
+    # Outbound side of one connection. Sends run as background tasks so a slow client never
+    # stalls inference or other clients; beyond max_pending in-flight sends new results are dropped.
+    # Messages that return a flow-control credit are forced through: the client sends nothing more
+    # until it gets the credit back, and the credits themselves bound how many of them can be in flight.
+    def __init__(self, websocket, session_id, max_pending=2, latency=None):
+        self.websocket = websocket
+        self.latency = latency
+        self.session_id = session_id
+        self.max_pending = max_pending
+        self.pending = set()
+        self.sent_results = 0
+        self.dropped_results = 0
+        self.failed_sends = 0
+        self.encoder = ResultEncoder()
+        self.flow_control = False
+
+    def has_capacity(self):
+        return len(self.pending) < self.max_pending
+
+    def send_nowait(self, message, force=False):
+        # Returns False when the message was dropped
+        if not force and not self.has_capacity():
+            self.dropped_results += 1
+            return False
+        task = asyncio.create_task(self._send(message))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+        return True
+
+    async def _send(self, message):
+        try:
+            started = time.perf_counter()
+            await self.websocket.send(message)
+            self.sent_results += 1
+            if self.latency is not None:
+                self.latency.record('send', (time.perf_counter() - started) * 1000)
+        except websockets.exceptions.ConnectionClosed:
+            self.failed_sends += 1
+        except Exception as e:
+            self.failed_sends += 1
+            print(f"Error sending to client: {e}")
+
+    def cancel_pending(self):
+        for task in list(self.pending):
+            task.cancel()
+
+    def stats(self):
+        return {
+            'session_id': self.session_id,
+            'sent_results': self.sent_results,
+            'dropped_results': self.dropped_results,
+            'failed_sends': self.failed_sends,
+            'pending_sends': len(self.pending)
+        }
 
 class WebSocketServer:
-    def __init__(self):
-        self.detector = HandGestureDetector()
-        self.clients = set()
+    def __init__(self, inference_workers=2, session_idle_timeout=30.0, max_pending_sends=2,
+                 latency_budget=0.030, adaptive_quality=True):
+        self.hands_pool = HandsPool()
+        self.inference_pool = InferencePool(inference_workers)
+        self.controller = QualityController(latency_budget, enabled=adaptive_quality)
+        self.scheduler = TierScheduler(
+            self.inference_pool, self.controller, on_tier_change=self.broadcast_quality
+        )
+        self.session_idle_timeout = session_idle_timeout
+        self.max_pending_sends = max_pending_sends
+        self.clients = {}
+        self.observers = set()
+        self.next_session_id = 1
+        # Server-wide per-stage latency; each session's LatencyStats forwards into it
+        self.latency = LatencyStats()
 
     async def register_client(self, websocket):
-        self.clients.add(websocket)
+        channel = ClientChannel(
+            websocket, self.next_session_id, self.max_pending_sends, LatencyStats(self.latency)
+        )
+        self.next_session_id += 1
+        self.clients[websocket] = channel
         print(f"✅ Client connected. Total clients: {len(self.clients)}")
+        channel.send_nowait(self.quality_message(self.controller.info()))
+        return channel
 
     async def unregister_client(self, websocket):
-        self.clients.discard(websocket)
+        channel = self.clients.pop(websocket, None)
+        if channel:
+            self.observers.discard(channel)
+            channel.cancel_pending()
         print(f"❌ Client disconnected. Total clients: {len(self.clients)}")
 
-    async def broadcast_detection(self, detection_result):
-        if self.clients:
-            message = json.dumps({
-                'type': 'gesture_detection',
-                'data': detection_result
-            })
-            disconnected = set()
-            for client in self.clients:
-                try:
-                    await client.send(message)
-                except websockets.exceptions.ConnectionClosed:
-                    disconnected.add(client)
-                except Exception as e:
-                    print(f"Error sending to client: {e}")
-                    disconnected.add(client)
-            for client in disconnected:
-                self.clients.discard(client)
+    def quality_message(self, info):
+        return json.dumps({'type': 'quality_tier', 'data': info, 'timestamp': time.time()})
+
+    def broadcast_quality(self, info):
+        # Every session shares the tier, so every client hears about a change
+        print(f"🎚️ Quality tier {info['tier']}: {info['width']}x{info['height']}, "
+              f"model_complexity={info['model_complexity']}")
+        message = self.quality_message(info)
+        for channel in self.clients.values():
+            channel.send_nowait(message)
+
+    def deliver_detection(self, channel, detection_result):
+        # Results go back to the session that sent the frame, plus any subscribed observers.
+        # Capacity is checked before encoding: encoding advances the delta chain, and a delta the client
+        # never receives would leave it applying every later delta to a stale base.
+        if channel.flow_control or channel.has_capacity():
+            channel.send_nowait(channel.encoder.encode(detection_result), force=channel.flow_control)
+        else:
+            channel.dropped_results += 1
+        observers = [observer for observer in self.observers if observer is not channel]
+        if observers:
+            # Observers watch many sessions at once, so they always get self-contained JSON
+            observer_message = encode_json_result(detection_result, session_id=channel.session_id)
+            for observer in observers:
+                observer.send_nowait(observer_message)
+
+    def frame_stage_ms(self, meta, received_ts, queue_age):
+        # Browser-side stages come from the frame header; network is what's left of capture -> receive.
+        # Browser and server clocks are only comparable on the same machine, so network is clamped at 0.
+        stage_ms = dict(meta.get('stage_ms', {}))
+        stage_ms['queue'] = queue_age * 1000
+        if 'capture_ts' in meta:
+            browser_ms = 0.0
+            for stage in ('capture', 'encode'):
+                if f'{stage}_ms' in meta:
+                    stage_ms[stage] = meta[f'{stage}_ms']
+                    browser_ms += meta[f'{stage}_ms']
+            stage_ms['network'] = max(0.0, received_ts - meta['capture_ts'] - browser_ms)
+        return stage_ms
+
+    async def handle_video_frame(self, channel, detector, kind, payload, slot, received_ts):
+        # Returns True when a result was delivered for the frame
+        queue_age = slot.last_queue_age
+        points, is_fist, meta = await self.scheduler.submit(detector, kind, payload)
+        if meta.get('decode_failed'):
+            print("❌ Failed to decode video frame")
+            return False
+        stage_ms = self.frame_stage_ms(meta, received_ts, queue_age)
+        started = time.perf_counter()
+        # Capture time paces the gesture debounce; it is on the client's clock, which is fine per session
+        timestamp = meta['capture_ts'] / 1000 if 'capture_ts' in meta else None
+        detection_result = detector.classify(points, is_fist, timestamp)
+        stage_ms['classify'] = stage_ms.get('classify', 0.0) + (time.perf_counter() - started) * 1000
+        channel.latency.record_all(stage_ms)
+        # Echo frame identity so clients can match results to the frames they sent
+        for key in ('frame_id', 'capture_ts'):
+            if key in meta:
+                detection_result[key] = meta[key]
+        # Travels with JSON results; compact and binary results leave it out
+        detection_result['stage_ms'] = {stage: round(ms, 3) for stage, ms in stage_ms.items()}
+        self.deliver_detection(channel, detection_result)
+
+        # Debug output every 30 frames (about once per second)
+        if slot.processed_frames % 30 == 0:
+            stats = slot.stats()
+            inference = channel.latency.stages.get('inference')
+            inference_p95 = f", inference p95 {inference.summary()['p95_ms']}ms" if inference else ''
+            print(f"📊 Frame {slot.processed_frames}: {detection_result['debug_info']} | "
+                  f"dropped {stats['dropped_frames']}, queue age {stats['last_queue_age_ms']}ms{inference_p95}")
+        return True
+
+    async def consume_frames(self, channel, detector, slot):
+        # Runs inference on the newest frame only; stale frames were already dropped by the slot
+        while True:
+            try:
+                kind, payload, received_ts = await asyncio.wait_for(slot.get(), self.session_idle_timeout)
+            except asyncio.TimeoutError:
+                # Idle session: hand its Hands back to the pool, a new one is leased on the next frame
+                await self.inference_pool.run(detector.release_hands)
+                continue
+            delivered = False
+            try:
+                delivered = await self.handle_video_frame(channel, detector, kind, payload, slot, received_ts)
+            except FrameDecodeError as e:
+                print(f"❌ Invalid binary frame: {e}")
+            except Exception as e:
+                print(f"❌ Error processing frame: {e}")
+            if not delivered and channel.flow_control:
+                # No result will come back for this frame, so return its credit explicitly
+                channel.send_nowait(json.dumps({'type': 'frame_credit', 'data': {'credits': 1}}), force=True)
 
     async def handle_client(self, websocket):
-        await self.register_client(websocket)
-        frame_count = 0
+        channel = await self.register_client(websocket)
+        detector = HandGestureDetector(self.hands_pool)
+        slot = LatestFrameSlot()
+        consumer = asyncio.create_task(self.consume_frames(channel, detector, slot))
         try:
             async for message in websocket:
                 try:
+                    if isinstance(message, bytes):
+                        slot.put('binary', message)
+                        continue
+
                     data = json.loads(message)
                     if data['type'] == 'video_frame':
-                        frame_count += 1
-                        image_data = base64.b64decode(data['frame'].split(',')[1])
-                        nparr = np.frombuffer(image_data, np.uint8)
-                        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                        if frame is not None:
-                            detection_result, _ = self.detector.process_frame(frame)
-                            await self.broadcast_detection(detection_result)
-                            
-                            # Debug output every 30 frames (about once per second)
-                            if frame_count % 30 == 0:
-                                print(f"📊 Frame {frame_count}: {detection_result['debug_info']}")
-                        else:
-                            print("❌ Failed to decode video frame")
+                        slot.put('json', data)
                     elif data['type'] == 'update_settings':
-                        if 'stability_frames' in data:
-                            self.detector.required_fist_frames = data['stability_frames']
-                            print(f"✅ Updated stability frames to: {data['stability_frames']}")
+                        if detector.configure_gestures(data):
+                            print(f"✅ Fist debounce: press {detector.gestures.press_ms}ms, "
+                                  f"release {detector.gestures.release_ms}ms")
+                        if data.get('flow_control'):
+                            # Credit handshake: the client sends only while it holds a credit
+                            channel.flow_control = True
+                            await websocket.send(json.dumps({
+                                'type': 'flow_control',
+                                'data': {'credits': FLOW_CONTROL_CREDITS}
+                            }))
+                        if channel.encoder.configure(data):
+                            print(f"✅ Session {channel.session_id} results: {channel.encoder.result_format}, "
+                                  f"landmarks={channel.encoder.include_landmarks}, delta={channel.encoder.delta_landmarks}")
+                    elif data['type'] == 'subscribe':
+                        # Opt-in observer mode (e.g. a dashboard): receive every session's results
+                        self.observers.add(channel)
+                        print(f"👀 Session {channel.session_id} subscribed to all detections")
+                    elif data['type'] == 'unsubscribe':
+                        self.observers.discard(channel)
+                    elif data['type'] == 'get_stats':
+                        await websocket.send(json.dumps({
+                            'type': 'ingest_stats',
+                            'data': {
+                                **slot.stats(), **channel.stats(), **self.scheduler.stats(),
+                                'tracker': detector.tracker.stats() if detector._tracker else None,
+                                'hands_pool': self.hands_pool.stats()
+                            },
+                            'timestamp': time.time()
+                        }))
+                    elif data['type'] == 'get_latency_stats':
+                        # p50/p95/p99 and histogram buckets per stage, for this session and the whole server
+                        await websocket.send(json.dumps({
+                            'type': 'latency_stats',
+                            'data': {
+                                'session_id': channel.session_id,
+                                'session': channel.latency.summary(),
+                                'server': self.latency.summary()
+                            },
+                            'timestamp': time.time()
+                        }))
                     elif data['type'] == 'test_message':
                         print(f"🧪 Test message received: {data.get('message', 'No message')}")
                         # Send back a test response
@@ -179,28 +845,66 @@ class WebSocketServer:
         except Exception as e:
             print(f"❌ Connection error: {e}")
         finally:
+            consumer.cancel()
+            try:
+                await consumer
+            except asyncio.CancelledError:
+                pass
+            print(f"📈 Session ingest stats: {slot.stats()} {channel.stats()}")
+            for stage, summary in channel.latency.summary().items():
+                print(f"   ⏱️ {stage}: p50 {summary['p50_ms']}ms, p95 {summary['p95_ms']}ms, "
+                      f"p99 {summary['p99_ms']}ms ({summary['count']} frames)")
+            await self.inference_pool.run(detector.release_hands)
             await self.unregister_client(websocket)
 
+    async def evict_idle_hands(self, interval=30.0):
+        while True:
+            await asyncio.sleep(interval)
+            evicted = self.hands_pool.evict_idle()
+            if evicted:
+                print(f"🧹 Closed {evicted} idle Hands instance(s); pool: {self.hands_pool.stats()}")
+
 def main():
+    parser = argparse.ArgumentParser(description="Hand gesture detection WebSocket server")
+    parser.add_argument('--workers', type=int, default=min(2, os.cpu_count() or 1),
+                        help="number of MediaPipe inference worker threads")
+    parser.add_argument('--latency-budget-ms', type=float, default=30.0,
+                        help="per-frame inference latency the quality controller tries to hold")
+    parser.add_argument('--fixed-quality', action='store_true',
+                        help="always use 160x120 with model_complexity=1 instead of adapting the quality tier")
+    args = parser.parse_args()
+
     print("🚀 Starting Hand Gesture Detection Server...")
     print("📡 Server will run on ws://localhost:8765")
+    print(f"🧵 Inference workers: {args.workers}")
     print("📦 Make sure to install required packages:")
     print("   pip install opencv-python mediapipe websockets numpy")
     print()
-    server = WebSocketServer()
+    server = WebSocketServer(
+        inference_workers=args.workers,
+        latency_budget=args.latency_budget_ms / 1000.0,
+        adaptive_quality=not args.fixed_quality
+    )
     async def start_server():
         print("✅ Server started! Open the HTML file in your browser.")
         print("✊ Make a FIST to control the dino!")
         print("🔄 Waiting for connections...")
         print()
-        async with websockets.serve(server.handle_client, "localhost", 8765):
-            await asyncio.Future()
+        eviction = asyncio.create_task(server.evict_idle_hands())
+        try:
+            async with websockets.serve(server.handle_client, "localhost", 8765):
+                await asyncio.Future()
+        finally:
+            eviction.cancel()
     try:
         asyncio.run(start_server())
     except KeyboardInterrupt:
         print("\n🛑 Server stopped by user")
     except Exception as e:
         print(f"❌ Server error: {e}")
+    finally:
+        server.inference_pool.shutdown()
+        server.hands_pool.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
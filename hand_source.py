@@ -0,0 +1,189 @@
+"""
+Hand landmark sources for the gesture modes.
+
+Modes ask open_hand_source() for frames and landmarks. When the gesture daemon
+(gesture_daemon.py) is running, landmarks come from it over a local socket and
+the mode never opens the camera or loads MediaPipe itself, so switching modes
+skips camera open and model warm-up. Without the daemon the mode falls back to
+its own camera and Hands instance, exactly as before.
+"""
+
+import os
+import time
+from collections import namedtuple
+from multiprocessing.connection import Client, AuthenticationError
+
+import cv2
+import numpy as np
+
+import landmark_features
+from camera_reader import LatestFrameReader
+from daemon_auth import daemon_endpoint
+from frame_ring import FrameRing
+from inference_engine import AdaptiveHandTracker
+
+# Set by app.py when it has started the daemon, so modes wait for it instead of opening the camera
+DAEMON_WAIT_ENV = 'AIRCLICK_GESTURE_DAEMON_WAIT'
+
+# mp.solutions.hands.Hands defaults, for comparing what a mode asks for with what the daemon runs
+HANDS_DEFAULTS = {
+    'static_image_mode': False,
+    'max_num_hands': 2,
+    'model_complexity': 1,
+    'min_detection_confidence': 0.5,
+    'min_tracking_confidence': 0.5
+}
+
+# One processed camera frame: mirrored BGR image (None if not requested) and (N, 21, 3) landmarks
+HandFrame = namedtuple('HandFrame', ['seq', 'timestamp', 'frame', 'hands'])
+
+
+class LocalHandSource:
+    def __init__(self, camera_index=0, width=None, height=None, flip=True, **hands_options):
+        import mediapipe as mp
+
+        # Captures on its own thread; read() always gets the newest frame without waiting on the device
+        self.camera = LatestFrameReader(camera_index, width, height)
+        self.hands = mp.solutions.hands.Hands(**hands_options)
+        # Downscaled frames, with stationary frames skipped; MediaPipe tracks the hand between them
+        self.tracker = AdaptiveHandTracker(self.hands)
+        self.flip = flip
+        self.seq = 0
+        # Reused every frame: mirrored output and RGB input for MediaPipe
+        self.frame = None
+        self.rgb = None
+
+    def read(self, detect=True, out=None):
+        # out: optional preallocated (H, W, 3) buffer to receive the mirrored frame, e.g. a FrameRing slot
+        captured = self.camera.read()
+        if captured is None:
+            return None
+        _, timestamp, raw = captured
+        if out is None:
+            if self.frame is None or self.frame.shape != raw.shape:
+                self.frame = np.empty_like(raw)
+            out = self.frame
+        if self.flip:
+            cv2.flip(raw, 1, dst=out)
+        else:
+            np.copyto(out, raw)
+        hands = np.empty((0, 21, 3), dtype=np.float32)
+        if detect:
+            if self.rgb is None or self.rgb.shape != out.shape:
+                self.rgb = np.empty_like(out)
+            cv2.cvtColor(out, cv2.COLOR_BGR2RGB, dst=self.rgb)
+            hands = self.tracker.process_rgb(self.rgb)
+        else:
+            # Landmarks go stale while detection is paused; start over with a full-frame search
+            self.tracker.reset()
+        self.seq += 1
+        return HandFrame(self.seq, timestamp, out, hands)
+
+    def stats(self):
+        return self.camera.stats()
+
+    def close(self):
+        print(f"📷 Camera stats: {self.camera.stats()}")
+        self.camera.close()
+        self.hands.close()
+
+
+class DaemonHandSource:
+    # Pull model: each read() asks for the newest frame after the last one seen, so nothing queues up.
+    # Frames come from the daemon's shared-memory FrameRing: copy_frames=True copies each one into a
+    # reused local buffer the caller may draw on; False returns a read-only zero-copy view.
+    def __init__(self, address, authkey, frames=True, copy_frames=True, options=None):
+        self.conn = Client(address, authkey=authkey)
+        self.frames = frames
+        self.copy_frames = copy_frames
+        self.seq = 0
+        self.ring = None
+        self.buffer = None
+        if options is not None:
+            self._check_options(options)
+
+    def _check_options(self, options):
+        # The daemon runs one camera and one Hands for every mode; warn when this mode asked for different ones
+        self.conn.send(('options', options))
+        daemon_options = self.conn.recv()
+        mismatched = []
+        for key in sorted(set(HANDS_DEFAULTS) | set(options)):
+            wanted = options.get(key, HANDS_DEFAULTS.get(key))
+            running = daemon_options.get(key, HANDS_DEFAULTS.get(key))
+            if wanted is not None and wanted != running:
+                mismatched.append(f"{key}={running} (mode asked for {wanted})")
+        if mismatched:
+            print(f"⚠️ Gesture daemon settings differ from this mode's: {', '.join(mismatched)}")
+
+    def _attach(self, ring_info):
+        name, shape, slots = ring_info
+        if self.ring is not None and self.ring.name == name:
+            return
+        if self.ring is not None:
+            self.ring.close()
+        self.ring = FrameRing.attach(name, shape, slots)
+        self.buffer = np.empty(shape, dtype=np.uint8)
+
+    def _frame(self, packet):
+        self._attach(packet['ring'])
+        if not self.copy_frames:
+            return self.ring.view(packet['frame_seq'])
+        if self.ring.copy_into(packet['frame_seq'], self.buffer):
+            return self.buffer
+        return None
+
+    def read(self):
+        while True:
+            try:
+                self.conn.send(('next', self.seq, self.frames))
+                packet = self.conn.recv()
+            except (EOFError, OSError):
+                return None
+            self.seq = packet['seq']
+            frame = None
+            if self.frames:
+                frame = self._frame(packet)
+                if frame is None:
+                    # Slot was overwritten before we got to it; a newer frame is already waiting
+                    continue
+            return HandFrame(packet['seq'], packet['timestamp'], frame, packet['hands'])
+
+    def close(self):
+        self.conn.close()
+        if self.ring is not None:
+            self.ring.close()
+
+
+def connect_daemon(frames=True, wait=0.0, endpoint=None, options=None):
+    # endpoint: (address, authkey); defaults to the one app.py put in the environment.
+    # options: the camera/Hands options the mode would use locally, checked against the daemon's
+    endpoint = endpoint or daemon_endpoint()
+    if endpoint is None:
+        return None
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            return DaemonHandSource(*endpoint, frames=frames, options=options)
+        except (OSError, AuthenticationError):
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.2)
+
+
+def open_hand_source(frames=True, **local_options):
+    wait = float(os.environ.get(DAEMON_WAIT_ENV, 0))
+    source = connect_daemon(frames, wait, options=local_options)
+    if source is not None:
+        print("🔗 Using shared gesture daemon")
+        return source
+    return LocalHandSource(**local_options)
+
+
+def draw_hand(img, points, color=(224, 224, 224), point_color=(0, 0, 255)):
+    # Same look as mp_draw.draw_landmarks, from a (21, 3) array
+    h, w = img.shape[:2]
+    pixels = (points[:, :2] * (w, h)).astype(np.int32)
+    for a, b in landmark_features.HAND_CONNECTIONS:
+        cv2.line(img, tuple(pixels[a]), tuple(pixels[b]), color, 2)
+    for x, y in pixels:
+        cv2.circle(img, (int(x), int(y)), 2, point_color, 2)
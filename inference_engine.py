@@ -0,0 +1,87 @@
+"""
+Adaptive hand inference scheduling around a MediaPipe Hands instance.
+
+Instead of running hands.process on every frame, AdaptiveHandTracker:
+  - reuses the previous landmarks for up to max_skip frames while the hand
+    is stationary,
+  - runs the others downscaled to infer_width, always at the same size.
+
+Tracking itself is left to MediaPipe: a Hands built with
+static_image_mode=False already crops each frame around the previous
+landmarks and only runs palm detection when it loses the hand, so feeding it
+whole frames keeps that path intact. (Cropping on our side would need a
+static-image Hands, which runs palm detection on every call.)
+
+Used by hand_source.LocalHandSource (so regular.py and the other modes, and
+the gesture daemon) and by hand_detection_server.py per session.
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+import landmark_features
+
+INFER = 'infer'
+SKIP = 'skip'
+
+
+class AdaptiveHandTracker:
+    def __init__(self, hands, infer_width=320, motion_threshold=0.004, max_skip=2):
+        self.hands = hands                      # static_image_mode=False, so MediaPipe tracks between frames
+        self.infer_width = infer_width          # Frames wider than this are downscaled to it; None keeps them
+        self.motion_threshold = motion_threshold  # Mean landmark movement (normalized) below which we may skip
+        self.max_skip = max_skip
+        self.reset()
+
+    def reset(self):
+        self.points = np.empty((0, 21, 3), dtype=np.float32)
+        self.inference_ms = None                # Time spent in hands.process for the last frame, None if skipped
+        self.motion = float('inf')
+        self.skipped = 0
+        self.mode = INFER
+        self.counts = {INFER: 0, SKIP: 0}
+
+    def process_bgr(self, frame):
+        return self.process_rgb(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+    def process_rgb(self, rgb):
+        # Returns (N, 21, 3) landmarks normalized to the frame
+        if len(self.points) and self.motion < self.motion_threshold and self.skipped < self.max_skip:
+            self.skipped += 1
+            self.inference_ms = None
+            return self._done(SKIP, self.points)
+        self.skipped = 0
+
+        w = rgb.shape[1]
+        if self.infer_width and w > self.infer_width:
+            scale = self.infer_width / w
+            rgb = cv2.resize(rgb, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        started = time.perf_counter()
+        results = self.hands.process(rgb)
+        self.inference_ms = (time.perf_counter() - started) * 1000
+        points = landmark_features.hands_to_array(results)
+
+        self._update_motion(points)
+        self.points = points
+        return self._done(INFER, points)
+
+    def _update_motion(self, points):
+        if len(points) and points.shape == self.points.shape:
+            self.motion = float(np.abs(points[..., :2] - self.points[..., :2]).mean())
+        else:
+            self.motion = float('inf')
+
+    def _done(self, mode, points):
+        self.mode = mode
+        self.counts[mode] += 1
+        return points
+
+    def stats(self):
+        total = sum(self.counts.values())
+        return {
+            'mode': self.mode,
+            'frames': total,
+            **{f'{mode}_frames': count for mode, count in self.counts.items()}
+        }
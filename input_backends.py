@@ -0,0 +1,273 @@
+"""
+Input injection backends for InputDispatcher.
+
+Every backend has the pyautogui-style methods the dispatcher calls: moveTo,
+moveRel, click, rightClick, scroll, press, plus size(). failsafe_errors lists
+the exceptions that mean the user slammed the cursor into a screen corner to
+stop the program (pyautogui's fail-safe).
+
+  pyautogui  portable; on Linux every call is one or more X11 round-trips
+  uinput     Linux virtual devices created through /dev/uinput: each action is
+             one write() of input_events straight into the kernel, which works
+             under X11 and Wayland alike (needs write access to /dev/uinput,
+             e.g. membership of the input group or a udev rule). Its absolute
+             axis spans the whole virtual desktop (every monitor), and moving
+             the cursor into a corner trips the same fail-safe as pyautogui.
+
+open_input_backend() picks uinput when it is usable and falls back to pyautogui.
+AIRCLICK_INPUT_BACKEND=pyautogui|uinput|auto overrides the choice.
+"""
+
+import os
+import struct
+import sys
+import time
+
+INPUT_BACKEND_ENV = 'AIRCLICK_INPUT_BACKEND'
+UINPUT_PATH = '/dev/uinput'
+
+# linux/input-event-codes.h
+EV_SYN, EV_KEY, EV_REL, EV_ABS = 0x00, 0x01, 0x02, 0x03
+SYN_REPORT = 0
+REL_X, REL_Y, REL_WHEEL = 0x00, 0x01, 0x08
+ABS_X, ABS_Y = 0x00, 0x01
+BTN_LEFT, BTN_RIGHT, BTN_MIDDLE = 0x110, 0x111, 0x112
+BUS_VIRTUAL = 0x06
+
+# linux/uinput.h ioctls
+UI_DEV_CREATE = 0x5501
+UI_DEV_DESTROY = 0x5502
+UI_SET_EVBIT = 0x40045564
+UI_SET_KEYBIT = 0x40045565
+UI_SET_RELBIT = 0x40045566
+UI_SET_ABSBIT = 0x40045567
+
+# struct input_event: struct timeval, u16 type, u16 code, s32 value (the kernel fills in the time)
+INPUT_EVENT = struct.Struct('llHHi')
+ABS_CNT = 64
+UINPUT_NAME_SIZE = 80
+
+# pyautogui key names -> Linux key codes, for the keys the gesture modes press (and the usual extras)
+KEY_CODES = {
+    'esc': 1, 'escape': 1, 'backspace': 14, 'tab': 15, 'enter': 28, 'return': 28, 'space': 57, ' ': 57,
+    'ctrl': 29, 'shift': 42, 'alt': 56, 'up': 103, 'pageup': 104, 'left': 105, 'right': 106,
+    'end': 107, 'down': 108, 'pagedown': 109, 'home': 102, 'insert': 110, 'delete': 111,
+    'f11': 87, 'f12': 88
+}
+KEY_CODES.update({f'f{n}': 58 + n for n in range(1, 11)})
+KEY_CODES.update({str(n): n + 1 for n in range(1, 10)})
+KEY_CODES['0'] = 11
+for row, first_code in (('qwertyuiop', 16), ('asdfghjkl', 30), ('zxcvbnm', 44)):
+    KEY_CODES.update({letter: first_code + i for i, letter in enumerate(row)})
+
+
+class FailSafeException(Exception):
+    # UinputBackend's counterpart of pyautogui.FailSafeException
+    pass
+
+
+def virtual_desktop_size():
+    # Size of the X root window, which spans every monitor (XWayland included); the absolute pointer
+    # maps onto all of it. pyautogui.size() is the fallback when python-xlib or a display is missing.
+    try:
+        from Xlib import display, error
+    except ImportError:
+        display = None
+    if display is not None:
+        try:
+            connection = display.Display()
+        except error.DisplayError:
+            pass
+        else:
+            try:
+                geometry = connection.screen().root.get_geometry()
+                return geometry.width, geometry.height
+            finally:
+                connection.close()
+    import pyautogui
+    return tuple(pyautogui.size())
+
+
+def _events(*events):
+    # One buffer for a whole action, so it reaches the kernel in a single write()
+    return b''.join(INPUT_EVENT.pack(0, 0, ev_type, code, value) for ev_type, code, value in events)
+
+
+SYN = (EV_SYN, SYN_REPORT, 0)
+
+
+class UinputDevice:
+    # One virtual device. mock=True writes the same event stream to /dev/null without any ioctls,
+    # which keeps the syscall cost but needs no permissions (for benchmarks and CI boxes).
+    def __init__(self, name, keys=(), rel=(), abs_ranges=None, mock=False):
+        self.name = name
+        self.mock = mock
+        self.fd = os.open(os.devnull if mock else UINPUT_PATH, os.O_WRONLY | os.O_NONBLOCK)
+        if mock:
+            return
+        try:
+            self._configure(keys, rel, abs_ranges or {})
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def _configure(self, keys, rel, abs_ranges):
+        # Imported here: fcntl is POSIX-only, and this module must still import on Windows for pyautogui
+        import fcntl
+        if keys:
+            fcntl.ioctl(self.fd, UI_SET_EVBIT, EV_KEY)
+            for code in keys:
+                fcntl.ioctl(self.fd, UI_SET_KEYBIT, code)
+        if rel:
+            fcntl.ioctl(self.fd, UI_SET_EVBIT, EV_REL)
+            for code in rel:
+                fcntl.ioctl(self.fd, UI_SET_RELBIT, code)
+        absmax = [0] * ABS_CNT
+        if abs_ranges:
+            fcntl.ioctl(self.fd, UI_SET_EVBIT, EV_ABS)
+            for code, maximum in abs_ranges.items():
+                fcntl.ioctl(self.fd, UI_SET_ABSBIT, code)
+                absmax[code] = maximum
+        # Legacy struct uinput_user_dev setup: name, input_id, ff_effects_max, absmax/absmin/absfuzz/absflat
+        user_dev = struct.pack(
+            f'{UINPUT_NAME_SIZE}sHHHHI{ABS_CNT}i{ABS_CNT * 3}i',
+            self.name.encode()[:UINPUT_NAME_SIZE - 1], BUS_VIRTUAL, 0x1209, 0xA1C1, 1, 0,
+            *absmax, *([0] * ABS_CNT * 3)
+        )
+        os.write(self.fd, user_dev)
+        fcntl.ioctl(self.fd, UI_DEV_CREATE)
+
+    def emit(self, *events):
+        os.write(self.fd, _events(*events, SYN))
+
+    def close(self):
+        if not self.mock:
+            import fcntl
+            try:
+                fcntl.ioctl(self.fd, UI_DEV_DESTROY)
+            except OSError:
+                pass
+        os.close(self.fd)
+
+
+class UinputBackend:
+    # Three devices, since desktops classify a device by its capabilities: an absolute pointer for
+    # moveTo, a relative mouse for moveRel, buttons and the wheel, and a keyboard for press.
+    # With failsafe, every action first checks where moveTo last put the cursor and raises
+    # FailSafeException if it is in a corner of the desktop, as pyautogui.FAILSAFE does.
+    failsafe_errors = (FailSafeException,)
+
+    def __init__(self, screen_size=None, mock=False, failsafe=True):
+        if screen_size is None:
+            screen_size = virtual_desktop_size()
+        self.width, self.height = screen_size
+        self.failsafe = failsafe
+        self.corners = {(0, 0), (self.width - 1, 0), (0, self.height - 1), (self.width - 1, self.height - 1)}
+        self.position = None
+        buttons = (BTN_LEFT, BTN_RIGHT, BTN_MIDDLE)
+        self.pointer = UinputDevice(
+            'airclick pointer', keys=buttons, abs_ranges={ABS_X: self.width - 1, ABS_Y: self.height - 1}, mock=mock
+        )
+        self.mouse = UinputDevice('airclick mouse', keys=buttons, rel=(REL_X, REL_Y, REL_WHEEL), mock=mock)
+        self.keyboard = UinputDevice('airclick keyboard', keys=sorted(set(KEY_CODES.values())), mock=mock)
+        if not mock:
+            # Give udev and the compositor a moment to pick the new devices up before the first event
+            time.sleep(0.2)
+
+    def size(self):
+        return self.width, self.height
+
+    def _check_failsafe(self):
+        # Only cursor positions we set are known; reading the real one would cost an X round-trip per call
+        if self.failsafe and self.position in self.corners:
+            raise FailSafeException(f"Fail-safe triggered: cursor moved to the {self.position} corner")
+
+    def moveTo(self, x, y):
+        self._check_failsafe()
+        x = min(max(int(x), 0), self.width - 1)
+        y = min(max(int(y), 0), self.height - 1)
+        self.pointer.emit((EV_ABS, ABS_X, x), (EV_ABS, ABS_Y, y))
+        self.position = (x, y)
+
+    def moveRel(self, dx, dy):
+        self._check_failsafe()
+        self.mouse.emit((EV_REL, REL_X, int(dx)), (EV_REL, REL_Y, int(dy)))
+        # Where a relative move ends up depends on pointer acceleration, so it is no longer known
+        self.position = None
+
+    def _click(self, button):
+        self._check_failsafe()
+        # Press and release in one write; the SYN in between makes them two separate reports
+        self.mouse.emit((EV_KEY, button, 1), SYN, (EV_KEY, button, 0))
+
+    def click(self):
+        self._click(BTN_LEFT)
+
+    def rightClick(self):
+        self._click(BTN_RIGHT)
+
+    def scroll(self, clicks):
+        self._check_failsafe()
+        # Same units as pyautogui on Linux: wheel notches, positive is up
+        self.mouse.emit((EV_REL, REL_WHEEL, int(clicks)))
+
+    def press(self, key):
+        self._check_failsafe()
+        code = KEY_CODES.get(key.lower())
+        if code is None:
+            raise ValueError(f"No uinput key code for {key!r}")
+        self.keyboard.emit((EV_KEY, code, 1), SYN, (EV_KEY, code, 0))
+
+    def close(self):
+        for device in (self.pointer, self.mouse, self.keyboard):
+            device.close()
+
+
+class PyAutoGuiBackend:
+    def __init__(self, pause=0.0):
+        import pyautogui
+        pyautogui.PAUSE = pause
+        self.pyautogui = pyautogui
+        self.failsafe_errors = (pyautogui.FailSafeException,)
+
+    def size(self):
+        return self.pyautogui.size()
+
+    def moveTo(self, x, y):
+        self.pyautogui.moveTo(x, y)
+
+    def moveRel(self, dx, dy):
+        self.pyautogui.moveRel(dx, dy)
+
+    def click(self):
+        self.pyautogui.click()
+
+    def rightClick(self):
+        self.pyautogui.rightClick()
+
+    def scroll(self, clicks):
+        self.pyautogui.scroll(clicks)
+
+    def press(self, key):
+        self.pyautogui.press(key)
+
+    def close(self):
+        pass
+
+
+def uinput_available():
+    return sys.platform.startswith('linux') and os.access(UINPUT_PATH, os.W_OK)
+
+
+def open_input_backend(name=None, pause=0.0, screen_size=None):
+    name = name or os.environ.get(INPUT_BACKEND_ENV, 'auto')
+    if name not in ('auto', 'uinput', 'pyautogui'):
+        raise ValueError(f"Unknown input backend {name!r}, expected auto, uinput or pyautogui")
+    if name == 'uinput' or (name == 'auto' and uinput_available()):
+        try:
+            return UinputBackend(screen_size=screen_size)
+        except OSError as e:
+            if name == 'uinput':
+                raise
+            print(f"⚠️ uinput unavailable ({e}), falling back to pyautogui")
+    return PyAutoGuiBackend(pause=pause)
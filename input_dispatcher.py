@@ -0,0 +1,142 @@
+"""
+Non-blocking input injection for the gesture modes.
+
+Vision loops hand cursor moves, clicks, scrolls and key presses to an
+InputDispatcher, which injects them on its own thread, so a slow OS input stack
+(or pyautogui's PAUSE) never holds up the next frame. Cursor moves coalesce:
+only the newest pending target is kept. Everything else runs in the order it
+was queued, and a pending move is flushed first so a click lands where the
+cursor was meant to be at that moment.
+
+The backend is anything with pyautogui-style moveTo/click/rightClick/scroll/press
+methods; by default open_input_backend() picks uinput on Linux when it is
+writable and pyautogui otherwise (see input_backends.py).
+
+If the backend's fail-safe fires (cursor pushed into a screen corner), the
+dispatcher drops everything queued, stops injecting and sets
+failsafe_triggered; the mode loops check it and exit.
+"""
+
+import threading
+import time
+from collections import deque
+
+from input_backends import open_input_backend
+from latency_stats import LatencyStats
+
+MOVE = 'moveTo'
+
+
+class InputDispatcher:
+    def __init__(self, backend=None, pause=0.0):
+        self.owns_backend = backend is None
+        if backend is None:
+            # The dispatcher thread is the only caller, so pyautogui's per-call safety sleep only costs throughput
+            backend = open_input_backend(pause=pause)
+        self.backend = backend
+        self.actions = deque()          # (name, func or None for a backend method, args, queued_at), in order
+        self.pending_move = None        # (x, y, queued_at); only the newest survives
+        self.condition = threading.Condition()
+        self.running = True
+        self.latency = LatencyStats()
+        self.coalesced_moves = 0
+        self.errors = 0
+        self.failsafe_triggered = False
+        self.thread = threading.Thread(target=self._run, name='input-dispatcher', daemon=True)
+        self.thread.start()
+
+    def move_to(self, x, y):
+        with self.condition:
+            if not self.running:
+                return
+            if self.pending_move is not None:
+                self.coalesced_moves += 1
+            self.pending_move = (x, y, time.perf_counter())
+            self.condition.notify()
+
+    def _enqueue(self, name, func, args):
+        with self.condition:
+            if not self.running:
+                return
+            if self.pending_move is not None:
+                x, y, queued_at = self.pending_move
+                self.actions.append((MOVE, None, (x, y), queued_at))
+                self.pending_move = None
+            self.actions.append((name, func, args, time.perf_counter()))
+            self.condition.notify()
+
+    def click(self):
+        self._enqueue('click', None, ())
+
+    def right_click(self):
+        self._enqueue('rightClick', None, ())
+
+    def scroll(self, clicks):
+        self._enqueue('scroll', None, (clicks,))
+
+    def press(self, key):
+        self._enqueue('press', None, (key,))
+
+    def call(self, name, func, *args):
+        # Any other blocking input-side work, kept in order with the rest; name labels its latency
+        self._enqueue(name, func, args)
+
+    def _next(self):
+        with self.condition:
+            self.condition.wait_for(lambda: self.actions or self.pending_move is not None or not self.running)
+            if self.actions:
+                return self.actions.popleft()
+            if self.pending_move is not None:
+                x, y, queued_at = self.pending_move
+                self.pending_move = None
+                return MOVE, None, (x, y), queued_at
+            return None
+
+    def _stop_for_failsafe(self, name):
+        with self.condition:
+            self.actions.clear()
+            self.pending_move = None
+            self.running = False
+        self.failsafe_triggered = True
+        print(f"🛑 Fail-safe triggered during {name}: input injection stopped")
+
+    def _run(self):
+        failsafe_errors = getattr(self.backend, 'failsafe_errors', ())
+        while True:
+            action = self._next()
+            if action is None:
+                return
+            name, func, args, queued_at = action
+            try:
+                (func or getattr(self.backend, name))(*args)
+            except failsafe_errors:
+                self._stop_for_failsafe(name)
+                return
+            except Exception as e:
+                self.errors += 1
+                print(f"❌ Input action {name} failed: {e}")
+            self.latency.record(name, (time.perf_counter() - queued_at) * 1000)
+
+    def stats(self):
+        return {
+            'backend': type(self.backend).__name__,
+            'coalesced_moves': self.coalesced_moves,
+            'errors': self.errors,
+            'failsafe_triggered': self.failsafe_triggered,
+            'latency': {
+                name: {key: summary[key] for key in ('count', 'p50_ms', 'p95_ms', 'p99_ms')}
+                for name, summary in self.latency.summary().items()
+            }
+        }
+
+    def close(self, drain=True):
+        # Lets queued actions finish unless drain is False
+        with self.condition:
+            if not drain:
+                self.actions.clear()
+                self.pending_move = None
+            self.running = False
+            self.condition.notify()
+        self.thread.join(timeout=2.0)
+        if self.owns_backend:
+            self.backend.close()
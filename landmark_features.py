@@ -0,0 +1,73 @@
+"""
+Shared hand landmark features for every gesture mode.
+
+MediaPipe landmarks are converted once per frame into a (21, 3) float32 array
+(x, y, z normalized), and every finger/distance feature is computed with
+vectorized NumPy ops. All functions also accept a batch shaped (..., 21, 3).
+"""
+
+import numpy as np
+
+THUMB_TIP = 4
+THUMB_IP = 3
+FINGER_TIPS = np.array([8, 12, 16, 20])       # Index, middle, ring, pinky
+FINGER_PIPS = FINGER_TIPS - 2                  # Middle joints
+FINGER_MCPS = np.array([5, 9, 13, 17])         # Finger bases
+INDEX_MCP = 5
+
+# Same topology as mp.solutions.hands.HAND_CONNECTIONS, kept here so drawing doesn't need MediaPipe
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4),
+    (0, 5), (5, 6), (6, 7), (7, 8),
+    (5, 9), (9, 10), (10, 11), (11, 12),
+    (9, 13), (13, 14), (14, 15), (15, 16),
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20)
+)
+
+
+def landmarks_to_array(hand_landmarks):
+    # Accepts a NormalizedLandmarkList or its .landmark sequence
+    landmarks = getattr(hand_landmarks, 'landmark', hand_landmarks)
+    return np.array([(lm.x, lm.y, lm.z) for lm in landmarks], dtype=np.float32)
+
+
+def hands_to_array(results):
+    # All detected hands of a MediaPipe result as (N, 21, 3); N is 0 when nothing was found
+    if not results.multi_hand_landmarks:
+        return np.empty((0, 21, 3), dtype=np.float32)
+    return np.stack([landmarks_to_array(hand) for hand in results.multi_hand_landmarks])
+
+
+def fingers_extended(points):
+    # (..., 5) bool for thumb, index, middle, ring, pinky.
+    # Thumb: tip left of its IP joint (mirrored selfie view); fingers: tip above the middle joint.
+    thumb = points[..., THUMB_TIP, 0] < points[..., THUMB_IP, 0]
+    fingers = points[..., FINGER_TIPS, 1] < points[..., FINGER_PIPS, 1]
+    return np.concatenate([thumb[..., np.newaxis], fingers], axis=-1)
+
+
+def fingers_folded(points, margin=0.02):
+    # (..., 4) bool: index..pinky tips clearly below their middle joints
+    return points[..., FINGER_TIPS, 1] > points[..., FINGER_PIPS, 1] + margin
+
+
+def fingertips_below_base(points):
+    # (..., 4) bool: index..pinky tips below their base knuckles
+    return points[..., FINGER_TIPS, 1] > points[..., FINGER_MCPS, 1]
+
+
+def distance(points, a, b):
+    # 2D image-plane distance between landmarks a and b
+    delta = points[..., a, :2] - points[..., b, :2]
+    return np.hypot(delta[..., 0], delta[..., 1])
+
+
+def is_fist(points):
+    # (...,) bool: all four fingers folded and below their bases, thumb tucked near the index base
+    thumb_folded = distance(points, THUMB_TIP, INDEX_MCP) < 0.15
+    return (
+        fingers_folded(points).all(axis=-1)
+        & fingertips_below_base(points).all(axis=-1)
+        & thumb_folded
+    )
+
@@ -0,0 +1,67 @@
+"""
+Per-stage latency statistics for the gesture pipeline.
+
+Each stage (network, decode, inference, ...) keeps a fixed-bucket histogram of
+every sample plus a bounded window of recent samples for percentiles, so
+reporting stays cheap no matter how long a session runs. All values are in
+milliseconds.
+"""
+
+from collections import deque
+
+import numpy as np
+
+# Upper bucket edges in ms; the last bucket catches everything slower
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+PERCENTILES = (50, 95, 99)
+
+
+class StageStats:
+    def __init__(self, window=1024):
+        self.recent = deque(maxlen=window)
+        self.buckets = np.zeros(len(HISTOGRAM_BUCKETS_MS) + 1, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, ms):
+        self.recent.append(ms)
+        self.buckets[np.searchsorted(HISTOGRAM_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def summary(self):
+        percentiles = np.percentile(self.recent, PERCENTILES) if self.recent else [0.0] * len(PERCENTILES)
+        labels = [f'<={edge}' for edge in HISTOGRAM_BUCKETS_MS] + [f'>{HISTOGRAM_BUCKETS_MS[-1]}']
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max, 3),
+            **{f'p{p}_ms': round(float(value), 3) for p, value in zip(PERCENTILES, percentiles)},
+            'histogram_ms': dict(zip(labels, self.buckets.tolist()))
+        }
+
+
+class LatencyStats:
+    # Samples are also forwarded to parent, e.g. a server-wide LatencyStats behind each session's
+    def __init__(self, parent=None, window=1024):
+        self.parent = parent
+        self.window = window
+        self.stages = {}
+
+    def record(self, stage, ms):
+        if ms is None:
+            return
+        if stage not in self.stages:
+            self.stages[stage] = StageStats(self.window)
+        self.stages[stage].record(ms)
+        if self.parent is not None:
+            self.parent.record(stage, ms)
+
+    def record_all(self, stage_ms):
+        for stage, ms in stage_ms.items():
+            self.record(stage, ms)
+
+    def summary(self):
+        return {stage: stats.summary() for stage, stats in self.stages.items()}
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Load generator for hand_detection_server.py: many simulated dino-game players.
+
+Each player opens its own WebSocket connection and streams frames from a sample
+corpus (a frame directory or video, see benchmark_detection.load_frames) at the
+browser's cadence. By default it behaves like dino-game.html: binary frames,
+binary results without landmarks, credit-based flow control capped at --fps.
+With --protocol json it behaves like older pages instead: base64 video_frame
+messages on a fixed timer, JSON results, no update_settings.
+
+Records result latency, delivered frame rate, dropped connections and (with
+--server-pid or --spawn-server) server CPU. --ramp adds players step by step
+until latency or frame rate degrades, and reports the saturation point.
+
+    python load_generator.py recordings/frames/ --clients 8 --duration 30 --spawn-server
+    python load_generator.py recordings/clip.mp4 --ramp --step 2 --max-p95-ms 250 --server-pid 4242
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import subprocess
+import sys
+import time
+
+import websockets
+
+from benchmark_detection import frame_message, load_frames
+from hand_detection_server import RESULT_HEADER
+from latency_stats import LatencyStats
+
+DEFAULT_URI = 'ws://localhost:8765'
+
+
+class StepStats:
+    # Everything the players record while one load level is running
+    def __init__(self, clients):
+        self.clients = clients
+        self.latency = LatencyStats()
+        self.frames_sent = 0
+        self.results = 0
+        self.dropped_connections = 0
+        self.failed_connections = 0
+        self.started = time.perf_counter()
+
+    def summary(self, target_fps, cpu_percent=None):
+        elapsed = time.perf_counter() - self.started
+        result_latency = self.latency.summary().get('result', {})
+        fps_per_client = self.results / elapsed / self.clients if elapsed and self.clients else 0.0
+        return {
+            'clients': self.clients,
+            'elapsed_s': round(elapsed, 2),
+            'frames_sent': self.frames_sent,
+            'results': self.results,
+            'fps_per_client': round(fps_per_client, 2),
+            'target_fps': target_fps,
+            'p50_ms': result_latency.get('p50_ms'),
+            'p95_ms': result_latency.get('p95_ms'),
+            'p99_ms': result_latency.get('p99_ms'),
+            'dropped_connections': self.dropped_connections,
+            'failed_connections': self.failed_connections,
+            'server_cpu_percent': cpu_percent
+        }
+
+
+class CpuSampler:
+    # Process CPU from /proc/<pid>/stat (Linux); 100% means one full core
+    def __init__(self, pid):
+        self.pid = pid
+        self.ticks_per_second = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+        self.last = self._sample()
+
+    def _sample(self):
+        try:
+            with open(f'/proc/{self.pid}/stat') as f:
+                # The command name may contain spaces; fields after it are fixed
+                fields = f.read().rsplit(')', 1)[1].split()
+        except (OSError, IndexError):
+            return None
+        return (int(fields[11]) + int(fields[12])) / self.ticks_per_second, time.perf_counter()
+
+    def percent(self):
+        # CPU since the previous call
+        current = self._sample()
+        previous, self.last = self.last, current
+        if current is None or previous is None or current[1] == previous[1]:
+            return None
+        return round((current[0] - previous[0]) / (current[1] - previous[1]) * 100, 1)
+
+
+class Player:
+    def __init__(self, uri, frames, fps, protocol, recorder, offset=0, result_timeout=2.0):
+        self.uri = uri
+        self.frames = frames
+        self.fps = fps
+        self.protocol = protocol
+        self.recorder = recorder          # Object whose .step is the StepStats to record into
+        self.next_frame = offset          # Players start at different corpus positions
+        self.result_timeout = result_timeout
+        self.sent_at = {}
+        self.credits = 1
+        self.credit_returned = asyncio.Event()
+
+    def _message(self, frame_id):
+        _, frame, data = self.frames[frame_id % len(self.frames)]
+        if self.protocol == 'binary':
+            return frame_message(frame_id & 0xFFFFFFFF, frame, data, time.time() * 1000)
+        return json.dumps({
+            'type': 'video_frame',
+            'frame': 'data:image/jpeg;base64,' + base64.b64encode(data).decode('ascii'),
+            'frame_id': frame_id,
+            'capture_ts': time.time() * 1000
+        })
+
+    def _on_result(self, frame_id):
+        sent_at = self.sent_at.pop(frame_id, None)
+        if sent_at is not None:
+            step = self.recorder.step
+            step.latency.record('result', (time.perf_counter() - sent_at) * 1000)
+            step.results += 1
+
+    async def receive(self, websocket):
+        async for message in websocket:
+            if isinstance(message, bytes):
+                self._on_result(RESULT_HEADER.unpack_from(message)[2])
+                self.credits += 1
+            else:
+                data = json.loads(message)
+                if data['type'] == 'gesture_detection':
+                    self._on_result(data['data'].get('frame_id'))
+                    self.credits += 1
+                elif data['type'] == 'flow_control':
+                    self.credits += data['data']['credits'] - 1
+                elif data['type'] == 'frame_credit':
+                    self.credits += data['data']['credits']
+                else:
+                    continue
+            self.credit_returned.set()
+
+    async def wait_for_credit(self):
+        while self.credits <= 0:
+            self.credit_returned.clear()
+            try:
+                await asyncio.wait_for(self.credit_returned.wait(), self.result_timeout)
+            except asyncio.TimeoutError:
+                # Same recovery as the browser: a lost result gives its credit back
+                self.credits += 1
+
+    async def run(self):
+        try:
+            websocket = await websockets.connect(self.uri, max_size=None)
+        except (OSError, websockets.exceptions.InvalidHandshake):
+            self.recorder.step.failed_connections += 1
+            return
+        receiver = None
+        try:
+            if self.protocol == 'binary':
+                await websocket.send(json.dumps({
+                    'type': 'update_settings',
+                    'result_format': 'binary',
+                    'include_landmarks': False,
+                    'flow_control': True
+                }))
+            receiver = asyncio.create_task(self.receive(websocket))
+            interval = 1.0 / self.fps
+            next_send = time.perf_counter()
+            while True:
+                if self.protocol == 'binary':
+                    await self.wait_for_credit()
+                    self.credits -= 1
+                frame_id = self.next_frame
+                self.next_frame += 1
+                self.sent_at[frame_id & 0xFFFFFFFF] = time.perf_counter()
+                await websocket.send(self._message(frame_id))
+                self.recorder.step.frames_sent += 1
+                # Forget frames whose result will never come, so sent_at stays bounded
+                if len(self.sent_at) > 64:
+                    self.sent_at.pop(next(iter(self.sent_at)))
+                next_send = max(next_send + interval, time.perf_counter())
+                await asyncio.sleep(next_send - time.perf_counter())
+        except websockets.exceptions.ConnectionClosed:
+            self.recorder.step.dropped_connections += 1
+        except Exception as e:
+            # A bug on our side, not load on the server: say so instead of just going quiet
+            print(f"❌ Player stopped: {e!r}")
+            raise
+        finally:
+            if receiver is not None:
+                receiver.cancel()
+            await websocket.close()
+
+
+class LoadGenerator:
+    def __init__(self, uri, frames, fps=20.0, protocol='binary', cpu=None):
+        self.uri = uri
+        self.frames = frames
+        self.fps = fps
+        self.protocol = protocol
+        self.cpu = cpu
+        self.players = []
+        self.step = StepStats(0)
+
+    def add_players(self, count):
+        for _ in range(count):
+            offset = len(self.players) * 7
+            player = Player(self.uri, self.frames, self.fps, self.protocol, self, offset)
+            self.players.append(asyncio.create_task(player.run()))
+
+    def begin_step(self):
+        self.step = StepStats(len(self.players))
+        if self.cpu:
+            self.cpu.percent()
+
+    def end_step(self):
+        return self.step.summary(self.fps, self.cpu.percent() if self.cpu else None)
+
+    async def stop(self):
+        for task in self.players:
+            task.cancel()
+        results = await asyncio.gather(*self.players, return_exceptions=True)
+        # Cancellation is how players normally end; anything else was already printed by the player
+        failed = [result for result in results if isinstance(result, Exception)]
+        if failed:
+            print(f"⚠️ {len(failed)} of {len(results)} players failed, the numbers above undercount the load")
+        self.players = []
+
+    async def run_fixed(self, clients, duration, warmup=2.0):
+        self.add_players(clients)
+        await asyncio.sleep(warmup)
+        self.begin_step()
+        await asyncio.sleep(duration)
+        summary = self.end_step()
+        await self.stop()
+        return summary
+
+    async def run_ramp(self, start, step, max_clients, step_duration, max_p95_ms, min_fps_ratio, warmup=2.0):
+        # Returns (per-step summaries, last step that met the targets, first saturated step); either may be None
+        steps = []
+        saturated_at = None
+        clients = start
+        self.add_players(start)
+        while True:
+            await asyncio.sleep(warmup)
+            self.begin_step()
+            await asyncio.sleep(step_duration)
+            summary = self.end_step()
+            steps.append(summary)
+            print_step(summary)
+            if is_saturated(summary, max_p95_ms, min_fps_ratio):
+                saturated_at = summary
+                break
+            if clients + step > max_clients:
+                break
+            self.add_players(step)
+            clients += step
+        await self.stop()
+        healthy = [s for s in steps if s is not saturated_at]
+        return steps, (healthy[-1] if healthy else None), saturated_at
+
+
+def is_saturated(summary, max_p95_ms, min_fps_ratio):
+    if summary['dropped_connections'] or summary['failed_connections']:
+        return True
+    if summary['p95_ms'] is None or summary['p95_ms'] > max_p95_ms:
+        return True
+    return summary['fps_per_client'] < summary['target_fps'] * min_fps_ratio
+
+
+def print_step(summary):
+    cpu = summary['server_cpu_percent']
+    print(f"👥 {summary['clients']} clients: {summary['fps_per_client']}/{summary['target_fps']} fps each, "
+          f"p50 {summary['p50_ms']}ms, p95 {summary['p95_ms']}ms, p99 {summary['p99_ms']}ms, "
+          f"dropped {summary['dropped_connections']}, failed {summary['failed_connections']}"
+          + (f", server CPU {cpu}%" if cpu is not None else ''))
+
+
+def spawn_server():
+    server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                            'hand_detection_server.py')])
+    # Give MediaPipe time to import before the first connection
+    time.sleep(3.0)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate many concurrent dino-game players against the server")
+    parser.add_argument('source', help="directory of JPEG/PNG frames or a video file to stream")
+    parser.add_argument('--uri', default=DEFAULT_URI)
+    parser.add_argument('--protocol', choices=('binary', 'json'), default='binary',
+                        help="binary: current dino-game.html; json: legacy base64 video_frame on a fixed timer")
+    parser.add_argument('--fps', type=float, default=20.0, help="per-player capture rate cap")
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=20.0, help="measurement time in fixed mode")
+    parser.add_argument('--ramp', action='store_true', help="add players step by step until saturation")
+    parser.add_argument('--step', type=int, default=2)
+    parser.add_argument('--max-clients', type=int, default=64)
+    parser.add_argument('--step-duration', type=float, default=10.0)
+    parser.add_argument('--max-p95-ms', type=float, default=200.0, help="ramp: saturated above this p95")
+    parser.add_argument('--min-fps-ratio', type=float, default=0.8,
+                        help="ramp: saturated when players get less than this share of --fps")
+    parser.add_argument('--server-pid', type=int, help="sample CPU of an already running server")
+    parser.add_argument('--spawn-server', action='store_true', help="start hand_detection_server.py for the run")
+    parser.add_argument('--limit', type=int, default=300, help="frames to load from the corpus")
+    parser.add_argument('--json', dest='json_path', help="also write the report to this file")
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.limit)
+    if not frames:
+        raise SystemExit(f"❌ No frames found in {args.source}")
+
+    server = spawn_server() if args.spawn_server else None
+    pid = server.pid if server else args.server_pid
+    cpu = CpuSampler(pid) if pid else None
+    generator = LoadGenerator(args.uri, frames, args.fps, args.protocol, cpu)
+    try:
+        if args.ramp:
+            print(f"📈 Ramping from {args.clients} to {args.max_clients} players, +{args.step} every "
+                  f"{args.step_duration}s")
+            steps, healthy, saturated = asyncio.run(generator.run_ramp(
+                args.clients, args.step, args.max_clients, args.step_duration,
+                args.max_p95_ms, args.min_fps_ratio
+            ))
+            report = {'mode': 'ramp', 'steps': steps, 'max_healthy': healthy, 'saturated_at': saturated}
+            if healthy:
+                print(f"✅ Sustains {healthy['clients']} players")
+            if saturated:
+                print(f"🔥 Saturated at {saturated['clients']} players")
+            else:
+                print("✅ Did not saturate before --max-clients")
+        else:
+            print(f"👥 {args.clients} players for {args.duration}s at up to {args.fps} fps")
+            summary = asyncio.run(generator.run_fixed(args.clients, args.duration))
+            print_step(summary)
+            report = {'mode': 'fixed', 'steps': [summary]}
+    except KeyboardInterrupt:
+        print("\n🛑 Load test stopped by user")
+        return 1
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
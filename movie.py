@@ -1,52 +1,53 @@
-import cv2
-import mediapipe as mp
-import pyautogui
-import time
-
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands()
-mp_draw = mp.solutions.drawing_utils
-
-cap = cv2.VideoCapture(0)
-last_action_time = 0
-
-def count_fingers(hand_landmarks):
-    tips = [8, 12, 16]  # index, middle, ring
-    count = 0
-    for tip in tips:
-        if hand_landmarks.landmark[tip].y < hand_landmarks.landmark[tip - 2].y:
-            count += 1
-    return count
+import landmark_features
+from gesture_state import GestureStateMachine, PRESS, HOLD
+from hand_source import open_hand_source
+from input_dispatcher import InputDispatcher
+from overlay import OverlayRenderer
+
+# Preview window on its own thread; headless (no drawing at all) when AIRCLICK_PREVIEW=off
+preview = OverlayRenderer("YouTube Controller")
+# Camera + MediaPipe (shared gesture daemon when it is running); no frames needed without a preview.
+# Same settings as the daemon, so the mode detects the same way with or without it
+source = open_hand_source(frames=preview.enabled, max_num_hands=1, min_detection_confidence=0.7)
+# Play/pause once per gesture; holding a seek gesture keeps seeking every 1.5 s
+gestures = GestureStateMachine(press_ms=150, release_ms=200, hold_ms=1500, repeat_ms=1500, cooldown_ms=500)
+# Key presses are injected on a background thread
+inputs = InputDispatcher()
+
+# Extended finger count -> key
+KEYS = {
+    1: 'k',  # Play/Pause
+    2: 'l',  # Fast forward
+    3: 'j'   # Rewind
+}
+
+def count_fingers(points):
+    # Extended index, middle and ring fingers
+    return int(landmark_features.fingers_extended(points)[1:4].sum())
 
 while True:
-    success, img = cap.read()
-    if not success:
+    hand_frame = source.read()
+    if hand_frame is None:
         break
 
-    img = cv2.flip(img, 1)
-    rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    result = hands.process(rgb)
-
-    if result.multi_hand_landmarks:
-        for handLms in result.multi_hand_landmarks:
-            mp_draw.draw_landmarks(img, handLms, mp_hands.HAND_CONNECTIONS)
-            fingers = count_fingers(handLms)
-
-            now = time.time()
-            if now - last_action_time > 1.5:
-                if fingers == 1:
-                    pyautogui.press('k')  # Play/Pause
-                    last_action_time = now
-                elif fingers == 2:
-                    pyautogui.press('l')  # Fast forward
-                    last_action_time = now
-                elif fingers == 3:
-                    pyautogui.press('j')  # Rewind
-                    last_action_time = now
-
-    cv2.imshow("YouTube Controller", img)
-    if cv2.waitKey(1) & 0xFF == 27:
+    gesture = None
+    if len(hand_frame.hands):
+        for points in hand_frame.hands:
+            fingers = count_fingers(points)
+            if fingers in KEYS:
+                gesture = fingers
+
+    for event in gestures.update(gesture, hand_frame.timestamp):
+        if event.kind == PRESS or (event.kind == HOLD and event.gesture != 1):
+            inputs.press(KEYS[event.gesture])
+
+    preview.submit(hand_frame.frame, hand_frame.hands)
+    if preview.quit_requested:
+        break
+    if inputs.failsafe_triggered:  # Cursor pushed into a screen corner
         break
 
-cap.release()
-cv2.destroyAllWindows()
+preview.close()
+inputs.close()
+print(f"🖱️ Input stats: {inputs.stats()}")
+source.close()
@@ -0,0 +1,181 @@
+"""
+Preview window for the gesture modes, decoupled from detection.
+
+The vision loop hands each frame's landmarks and status text to an
+OverlayRenderer and moves on. Drawing, cv2.imshow and waitKey run on the
+renderer's own thread at a lower rate (15 fps by default) from the latest
+snapshot, so painting the window never slows detection down. The frame is only
+copied when the renderer is due for a new one.
+
+Headless mode (AIRCLICK_PREVIEW=off, which app.py sets for the modes it
+launches) skips the window and all drawing; submit() and flash() return at
+once. All OpenCV GUI calls stay on the renderer thread, which the GTK and Qt
+backends on Linux and Windows accept. macOS only allows them on the main
+thread, so there submit() renders inline, still at the preview rate.
+
+If the window can't be shown (no display, a backend without GUI support), the
+preview turns itself off with a message instead of taking the mode down, and
+the vision loop carries on headless.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from hand_source import draw_hand
+from recording import FrameRateMeter
+
+PREVIEW_ENV = 'AIRCLICK_PREVIEW'
+FLASH_SECONDS = 0.7
+
+
+def preview_enabled(default=True):
+    value = os.environ.get(PREVIEW_ENV)
+    if value is None:
+        return default
+    return value.lower() not in ('0', 'off', 'false', 'no', 'headless')
+
+
+class OverlayRenderer:
+    # texts: (text, (x, y), color[, scale]) drawn on this frame; circles: ((x, y), radius, color, thickness)
+    # threaded=False renders from submit() on the caller's thread (the default on macOS)
+    def __init__(self, title, fps=15.0, enabled=None, quit_keys=(27,), threaded=None):
+        self.title = title
+        self.interval = 1.0 / fps
+        self.enabled = preview_enabled() if enabled is None else enabled
+        self.threaded = sys.platform != 'darwin' if threaded is None else threaded
+        self.quit_keys = quit_keys
+        self.quit_requested = False
+
+        self.lock = threading.Lock()
+        self.buffer = None
+        self.hands = ()
+        self.texts = ()
+        self.circles = ()
+        self.flashes = []           # (expires_at, text, org, color); outlive the frame that raised them
+        self.snapshot_seq = 0
+        self.next_snapshot = 0.0
+        self.canvas = None
+        self.rendered_seq = 0
+
+        self.snapshots = 0
+        self.frames_rendered = 0
+        self.render_rate = FrameRateMeter()
+        self.running = True
+        self.thread = None
+        if self.enabled and self.threaded:
+            self.thread = threading.Thread(target=self._run, name='overlay-renderer', daemon=True)
+            self.thread.start()
+
+    # Called from the vision loop
+
+    def submit(self, frame, hands=(), texts=(), circles=()):
+        if not self.enabled or frame is None:
+            return
+        now = time.perf_counter()
+        if now < self.next_snapshot:
+            # The renderer would never show this one
+            return
+        self.next_snapshot = now + self.interval
+        with self.lock:
+            if self.buffer is None or self.buffer.shape != frame.shape:
+                self.buffer = np.empty_like(frame)
+            # The source reuses its frame buffer for the next frame
+            np.copyto(self.buffer, frame)
+            self.hands = np.array(hands, dtype=np.float32)
+            self.texts = list(texts)
+            self.circles = list(circles)
+            self.snapshot_seq += 1
+        self.snapshots += 1
+        if not self.threaded:
+            self._render_safely(pace=False)
+
+    def flash(self, text, org, color, seconds=FLASH_SECONDS):
+        # One-off event labels ("Left Click") stay up long enough to be seen at the preview rate
+        if not self.enabled:
+            return
+        with self.lock:
+            self.flashes.append((time.perf_counter() + seconds, text, org, color))
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'snapshots': self.snapshots,
+            'rendered': self.frames_rendered,
+            'render_fps': round(self.render_rate.fps, 1)
+        }
+
+    def close(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        else:
+            self._destroy_window()
+
+    # Renderer (its own thread, or the caller's when not threaded)
+
+    def _draw(self, canvas, hands, texts, circles, flashes):
+        for points in hands:
+            draw_hand(canvas, points)
+        for center, radius, color, thickness in circles:
+            cv2.circle(canvas, center, radius, color, thickness)
+        for text, org, color, *scale in texts:
+            cv2.putText(canvas, text, org, cv2.FONT_HERSHEY_SIMPLEX, scale[0] if scale else 1, color, 2)
+        for _, text, org, color in flashes:
+            cv2.putText(canvas, text, org, cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
+
+    def _render(self, pace):
+        # Shows the newest snapshot and pumps window events; False before the first snapshot.
+        # pace: let waitKey sleep out the rest of the frame interval (renderer thread only)
+        started = time.perf_counter()
+        with self.lock:
+            self.flashes = [flash for flash in self.flashes if flash[0] > started]
+            fresh = self.snapshot_seq != self.rendered_seq
+            if fresh:
+                if self.canvas is None or self.canvas.shape != self.buffer.shape:
+                    self.canvas = np.empty_like(self.buffer)
+                np.copyto(self.canvas, self.buffer)
+                self.rendered_seq = self.snapshot_seq
+                hands, texts, circles = self.hands, self.texts, self.circles
+                flashes = list(self.flashes)
+        if self.canvas is None:
+            return False
+        if fresh:
+            self._draw(self.canvas, hands, texts, circles, flashes)
+            cv2.imshow(self.title, self.canvas)
+            self.frames_rendered += 1
+            self.render_rate.tick()
+        # waitKey pumps the window's events and, on the renderer thread, doubles as the frame-rate sleep
+        wait_ms = max(1, int((self.interval - (time.perf_counter() - started)) * 1000)) if pace else 1
+        key = cv2.waitKey(wait_ms)
+        if key != -1 and key & 0xFF in self.quit_keys:
+            self.quit_requested = True
+        return True
+
+    def _render_safely(self, pace):
+        try:
+            return self._render(pace)
+        except Exception as e:
+            # Typically cv2.error from a HighGUI without a display; detection goes on without a preview
+            print(f"⚠️ Preview disabled, the window can't be shown: {e}")
+            self.enabled = False
+            self.running = False
+            self._destroy_window()
+            return False
+
+    def _run(self):
+        while self.running:
+            if not self._render_safely(pace=True) and self.running:
+                time.sleep(self.interval)
+        self._destroy_window()
+
+    def _destroy_window(self):
+        if self.canvas is not None:
+            try:
+                cv2.destroyWindow(self.title)
+            except cv2.error:
+                pass
@@ -1,81 +1,67 @@
-import cv2
-import mediapipe as mp
-import pyautogui
-import time
-
-# MediaPipe setup
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.7)
-mp_draw = mp.solutions.drawing_utils
-
-# Webcam
-cap = cv2.VideoCapture(0)
-last_action_time = 0
-cooldown = 1.0  # seconds between gestures
-
-def count_fingers(lmList):
-    fingers = []
-    tips = [8, 12, 16, 20]  # Index, middle, ring, pinky
-
-    # Thumb
-    if lmList[4].x < lmList[3].x:
-        fingers.append(1)
-    else:
-        fingers.append(0)
-
-    # Other fingers
-    for tip in tips:
-        if lmList[tip].y < lmList[tip - 2].y:
-            fingers.append(1)
-        else:
-            fingers.append(0)
-    return fingers
+import landmark_features
+from gesture_state import GestureStateMachine, PRESS
+from hand_source import open_hand_source
+from input_dispatcher import InputDispatcher
+from overlay import OverlayRenderer
+
+# Preview window on its own thread; headless (no drawing at all) when AIRCLICK_PREVIEW=off
+preview = OverlayRenderer("Presentation Mode")
+# Camera + MediaPipe (shared gesture daemon when it is running); no frames needed without a preview
+source = open_hand_source(frames=preview.enabled, max_num_hands=1, min_detection_confidence=0.7)
+# One key press per gesture; show it again (or another one) to repeat
+gestures = GestureStateMachine(press_ms=150, release_ms=200, cooldown_ms=500)
+# Key presses are injected on a background thread
+inputs = InputDispatcher()
+
+# gesture -> (key, label, color)
+ACTIONS = {
+    'open': ('f5', "Start Presentation", (0, 255, 0)),
+    'fist': ('esc', "Exit Presentation", (0, 0, 255)),
+    'index': ('right', "Next Slide", (255, 255, 0)),
+    'index_middle': ('left', "Previous Slide", (255, 0, 255))
+}
+
+def count_fingers(points):
+    # [thumb, index, middle, ring, pinky] as 0/1
+    return landmark_features.fingers_extended(points).astype(int).tolist()
+
+def classify_gesture(fingers):
+    total = sum(fingers)
+    if total == 5:
+        return 'open'
+    if total == 0:
+        return 'fist'
+    if fingers == [0, 1, 0, 0, 0]:  # Index only
+        return 'index'
+    if fingers == [0, 1, 1, 0, 0]:  # Index + Middle
+        return 'index_middle'
+    return None
 
 while True:
-    success, img = cap.read()
-    if not success:
-        continue
-
-    img = cv2.flip(img, 1)
-    rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    results = hands.process(rgb)
-
-    if results.multi_hand_landmarks:
-        hand = results.multi_hand_landmarks[0]
-        lmList = hand.landmark
-        mp_draw.draw_landmarks(img, hand, mp_hands.HAND_CONNECTIONS)
-
-        fingers = count_fingers(lmList)
-        total = sum(fingers)
-        current_time = time.time()
-
-        if current_time - last_action_time > cooldown:
-            if total == 5:
-                pyautogui.press('f5')
-                cv2.putText(img, "Start Presentation", (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                last_action_time = current_time
-
-            elif total == 0:
-                pyautogui.press('esc')
-                cv2.putText(img, "Exit Presentation", (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-                last_action_time = current_time
-
-            elif fingers == [0, 1, 0, 0, 0]:  # Index only
-                pyautogui.press('right')
-                cv2.putText(img, "Next Slide", (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 2)
-                last_action_time = current_time
-
-            elif fingers == [0, 1, 1, 0, 0]:  # Index + Middle
-                pyautogui.press('left')
-                cv2.putText(img, "Previous Slide", (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 255), 2)
-                last_action_time = current_time
+    hand_frame = source.read()
+    if hand_frame is None:
+        break
 
+    gesture = None
+    texts = []
+    if len(hand_frame.hands):
+        gesture = classify_gesture(count_fingers(hand_frame.hands[0]))
     else:
-        cv2.putText(img, "No Hand Detected", (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (200, 200, 200), 2)
+        texts.append(("No Hand Detected", (10, 40), (200, 200, 200)))
 
-    cv2.imshow("Presentation Mode", img)
-    if cv2.waitKey(1) & 0xFF == 27:  # ESC key to exit
+    for event in gestures.update(gesture, hand_frame.timestamp):
+        if event.kind == PRESS:
+            key, label, color = ACTIONS[event.gesture]
+            inputs.press(key)
+            preview.flash(label, (10, 40), color)
+
+    preview.submit(hand_frame.frame, hand_frame.hands[:1], texts)
+    if preview.quit_requested:  # ESC in the preview window
+        break
+    if inputs.failsafe_triggered:  # Cursor pushed into a screen corner
         break
 
-cap.release()
-cv2.destroyAllWindows()
+preview.close()
+inputs.close()
+print(f"🖱️ Input stats: {inputs.stats()}")
+source.close()
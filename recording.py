@@ -0,0 +1,242 @@
+"""
+Background video/photo encoding for the camera mode.
+
+XVID and JPEG encoding run on their own thread so the capture + detection loop
+never waits on the encoder. Recording frames, photos and pre-roll frames queue
+separately: recording frames come first and are dropped (and counted) only when
+their own bounded queue is full, photos come next, and the pre-roll only keeps
+the newest frame the encoder hasn't reached yet. The writer places frames by
+capture timestamp at the measured frame rate, so a file still plays at real
+speed after drops.
+
+While not recording, the encoder keeps the last few seconds as JPEG bytes in a
+pre-roll buffer. Starting a recording writes those first, so the gesture that
+triggered it is in the file. Photos can pick the sharpest buffered frame.
+"""
+
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+def sharpness(frame):
+    # Variance of the Laplacian on a small grayscale copy: higher means less motion blur
+    small = cv2.resize(frame, (160, 120), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+class PreRollBuffer:
+    # Last `seconds` of frames as (timestamp, JPEG bytes, sharpness); compressed to bound memory
+    def __init__(self, seconds=3.0, jpeg_quality=85):
+        self.seconds = seconds
+        self.jpeg_quality = jpeg_quality
+        self.frames = deque()
+        self.bytes = 0
+
+    def add(self, frame, timestamp):
+        ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            return
+        self.frames.append((timestamp, jpeg, sharpness(frame)))
+        self.bytes += jpeg.nbytes
+        while self.frames and self.frames[0][0] < timestamp - self.seconds:
+            _, old, _ = self.frames.popleft()
+            self.bytes -= old.nbytes
+
+    def sharpest(self, since):
+        candidates = [entry for entry in self.frames if entry[0] >= since]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda entry: entry[2])
+
+    def drain(self):
+        frames = list(self.frames)
+        self.frames.clear()
+        self.bytes = 0
+        return frames
+
+
+class FrameRateMeter:
+    def __init__(self, window=30):
+        self.timestamps = deque(maxlen=window)
+
+    def tick(self, timestamp=None):
+        self.timestamps.append(time.time() if timestamp is None else timestamp)
+
+    @property
+    def fps(self):
+        if len(self.timestamps) < 2:
+            return 0.0
+        elapsed = self.timestamps[-1] - self.timestamps[0]
+        return (len(self.timestamps) - 1) / elapsed if elapsed > 0 else 0.0
+
+
+class AsyncVideoRecorder:
+    # Live frames and control messages, photos and pre-roll frames wait in separate queues, served in that
+    # order of priority by one encoder thread: an idle pre-roll backlog never delays a photo or a recording.
+    def __init__(self, max_queue=64, max_photos=8, fourcc='XVID', preroll_seconds=3.0, photo_window=0.5):
+        self.condition = threading.Condition()
+        self.commands = deque()          # start/frame/stop/close, in order; frames bounded by max_queue
+        self.photos = deque()
+        self.preroll_pending = None      # Newest pre-roll frame only; older ones are skipped when busy
+        self.max_queue = max_queue
+        self.max_photos = max_photos
+        self.queued_frames = 0
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.preroll = PreRollBuffer(preroll_seconds)
+        # Photos look this far back in the pre-roll for a sharper frame than the trigger frame
+        self.photo_window = photo_window
+        self.frames_submitted = 0
+        self.frames_dropped = 0
+        self.frames_written = 0
+        self.frames_duplicated = 0
+        self.preroll_frames = 0
+        self.preroll_skipped = 0
+        self.photos_written = 0
+        self.photos_dropped = 0
+        self.writer = None
+        self.fps = 0.0
+        self.start_time = None
+        self.last_frame = None
+        self.thread = threading.Thread(target=self._run, name='recorder', daemon=True)
+        self.thread.start()
+
+    # Called from the capture loop
+
+    def _command(self, item):
+        with self.condition:
+            self.commands.append(item)
+            self.condition.notify()
+
+    def start(self, filename, frame_size, fps):
+        # Written/duplicated counters are reset by the encoder thread when it opens the file
+        self.frames_submitted = 0
+        self.frames_dropped = 0
+        self._command(('start', filename, frame_size, fps))
+
+    def write(self, frame, timestamp):
+        self.frames_submitted += 1
+        with self.condition:
+            if self.queued_frames >= self.max_queue:
+                self.frames_dropped += 1
+                return
+            # Copy: the capture loop reuses its frame buffer for the next frame
+            self.commands.append(('frame', frame.copy(), timestamp))
+            self.queued_frames += 1
+            self.condition.notify()
+
+    def buffer_frame(self, frame, timestamp):
+        # Feed the pre-roll buffer while not recording; a frame the encoder hasn't reached yet is replaced
+        with self.condition:
+            if self.preroll_pending is not None:
+                self.preroll_skipped += 1
+            self.preroll_pending = (frame.copy(), timestamp)
+            self.condition.notify()
+
+    def stop(self):
+        self._command(('stop',))
+
+    def save_photo(self, filename, frame, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        with self.condition:
+            if len(self.photos) >= self.max_photos:
+                self.photos_dropped += 1
+                return False
+            self.photos.append((filename, frame.copy(), timestamp))
+            self.condition.notify()
+        return True
+
+    def close(self):
+        self._command(('close',))
+        self.thread.join()
+
+    def stats(self):
+        return {
+            'submitted': self.frames_submitted,
+            'written': self.frames_written,
+            'dropped': self.frames_dropped,
+            'duplicated': self.frames_duplicated,
+            'preroll': self.preroll_frames,
+            'preroll_skipped': self.preroll_skipped,
+            'queued': self.queued_frames,
+            'photos_queued': len(self.photos)
+        }
+
+    # Encoder thread
+
+    def _write_timed(self, frame, timestamp):
+        if self.start_time is None:
+            self.start_time = timestamp
+        # Frame index this capture time belongs to; repeat the previous frame over gaps left by drops
+        target = int(round((timestamp - self.start_time) * self.fps))
+        while self.last_frame is not None and self.frames_written < target:
+            self.writer.write(self.last_frame)
+            self.frames_written += 1
+            self.frames_duplicated += 1
+        if self.frames_written <= target:
+            self.writer.write(frame)
+            self.frames_written += 1
+        self.last_frame = frame
+
+    def _start(self, filename, frame_size, fps):
+        self.writer = cv2.VideoWriter(filename, self.fourcc, fps, frame_size)
+        self.fps = fps
+        self.frames_written = 0
+        self.frames_duplicated = 0
+        self.start_time = None
+        self.last_frame = None
+        # The seconds before the trigger go in first
+        buffered = self.preroll.drain()
+        self.preroll_frames = len(buffered)
+        for timestamp, jpeg, _ in buffered:
+            frame = cv2.imdecode(jpeg, cv2.IMREAD_COLOR)
+            if frame is not None and frame.shape[1::-1] == tuple(frame_size):
+                self._write_timed(frame, timestamp)
+
+    def _save_photo(self, filename, frame, timestamp):
+        best = self.preroll.sharpest(timestamp - self.photo_window)
+        if best is not None and best[2] > sharpness(frame):
+            # Already JPEG-encoded: write the bytes as they are
+            best[1].tofile(filename)
+        else:
+            cv2.imwrite(filename, frame)
+        self.photos_written += 1
+
+    def _next(self):
+        with self.condition:
+            self.condition.wait_for(lambda: self.commands or self.photos or self.preroll_pending is not None)
+            if self.commands:
+                item = self.commands.popleft()
+                if item[0] == 'frame':
+                    self.queued_frames -= 1
+                return item
+            if self.photos:
+                return ('photo',) + self.photos.popleft()
+            item, self.preroll_pending = self.preroll_pending, None
+            return ('preroll',) + item
+
+    def _run(self):
+        while True:
+            item = self._next()
+            kind = item[0]
+            if kind == 'start':
+                self._start(*item[1:])
+            elif kind == 'frame' and self.writer is not None:
+                self._write_timed(*item[1:])
+            elif kind == 'preroll' and self.writer is None:
+                self.preroll.add(*item[1:])
+            elif kind == 'stop' and self.writer is not None:
+                self.writer.release()
+                self.writer = None
+            elif kind == 'photo':
+                self._save_photo(*item[1:])
+            elif kind == 'close':
+                # Photos still waiting are saved before exiting
+                while self.photos:
+                    self._save_photo(*self.photos.popleft())
+                if self.writer is not None:
+                    self.writer.release()
+                return
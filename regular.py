@@ -1,115 +1,145 @@
-import cv2
-import mediapipe as mp
 import pyautogui
 import numpy as np
 import time
+import landmark_features
+from gesture_state import GestureStateMachine, PRESS, HOLD
+from hand_source import open_hand_source
+from input_dispatcher import InputDispatcher
+from overlay import OverlayRenderer
+from screenshot_service import ScreenshotService, PENDING, SAVED, DROPPED
+from smoothing import CursorCoalescer, make_filter
 
 # Screen size
 screen_w, screen_h = pyautogui.size()
 
 # Webcam settings
 cam_w, cam_h = 640, 480
-cap = cv2.VideoCapture(0)
-cap.set(3, cam_w)
-cap.set(4, cam_h)
-
-# MediaPipe setup
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.7)
-mp_draw = mp.solutions.drawing_utils
-
-# Previous location for smooth movement
-prev_x, prev_y = 0, 0
-smoothening = 7  # Higher = smoother & slower
-
-# Cooldowns
-click_delay = 1  # in seconds
-last_left_click = 0
-last_right_click = 0
-last_scroll = 0
-last_screenshot = 0
-screenshot_delay = 1  # seconds
-
-def fingers_up(lmList):
-    tips = [8, 12, 16, 20]
-    fingers = []
-    for i, tip in enumerate(tips):
-        if lmList[tip].y < lmList[tip - 2].y:
-            fingers.append(1)
-        else:
-            fingers.append(0)
-    return fingers
 
-while True:
-    success, img = cap.read()
-    img = cv2.flip(img, 1)  # Mirror image
-    rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    result = hands.process(rgb)
+# Preview window on its own thread; headless (no drawing at all) when AIRCLICK_PREVIEW=off
+preview = OverlayRenderer("Virtual Mouse")
+
+# Camera + MediaPipe (shared gesture daemon when it is running); no frames needed without a preview
+source = open_hand_source(
+    frames=preview.enabled, width=cam_w, height=cam_h, max_num_hands=1, min_detection_confidence=0.7
+)
+
+# Landmark smoothing: 'one_euro', 'kalman' or 'velocity' (see smoothing.py)
+smoothing_filter = make_filter('one_euro')
+# The cursor is placed where the hand will be about one display frame from now
+display_lead = 1 / 60  # seconds
+# Clicks, scrolls and cursor moves are injected on a background thread
+inputs = InputDispatcher()
+# Sub-pixel moves are skipped instead of sent to the OS
+cursor = CursorCoalescer(inputs.move_to)
+# Screenshots are grabbed, encoded ('png' or lossless 'webp') and written off the vision loop
+screenshots = ScreenshotService(fmt='png')
+shot = None  # Latest screenshot handle; its status is shown until shortly after it lands
+SHOT_CONFIRM_SECONDS = 1.5
+
+# Debounced gestures: a pose clicks once when it starts; holding index (or middle) alone
+# past hold_ms turns into scrolling every repeat_ms
+gestures = GestureStateMachine(press_ms=80, release_ms=150, hold_ms=1000, repeat_ms=300, cooldown_ms=250)
+
+GESTURE_LABELS = {
+    'left_click': ("Left Click", (255, 0, 0)),
+    'right_click': ("Right Click", (0, 0, 255)),
+    'scroll_up': ("Scroll Up", (0, 255, 255)),
+    'scroll_down': ("Scroll Down", (255, 255, 0))
+}
+
+SHOT_LABELS = {
+    PENDING: ("Taking Screenshot...", (0, 128, 255)),
+    SAVED: ("Screenshot Saved", (0, 200, 0)),
+    DROPPED: ("Screenshot Skipped (busy)", (0, 0, 255))
+}
+
+def fingers_up(points):
+    # [index, middle, ring, pinky] as 0/1
+    return landmark_features.fingers_extended(points)[1:].astype(int).tolist()
+
+def classify_gesture(fingers):
+    if fingers[0] == 1 and fingers[1] == 0:
+        return 'left_click'
+    if fingers[0] == 0 and fingers[1] == 1:
+        return 'right_click'
+    if fingers == [0, 0, 0, 0]:
+        return 'fist'
+    return None
 
-    if result.multi_hand_landmarks:
-        for hand in result.multi_hand_landmarks:
-            lmList = hand.landmark
+while True:
+    hand_frame = source.read()
+    if hand_frame is None:
+        break
 
-            mp_draw.draw_landmarks(img, hand, mp_hands.HAND_CONNECTIONS)
+    gesture = None
+    fingers = []
+    texts = []
+    if not len(hand_frame.hands):
+        # A hand that comes back may be anywhere; don't glide the cursor over from the old spot
+        smoothing_filter.reset()
+    if len(hand_frame.hands):
+        for points in hand_frame.hands:
+            # Smooth all landmarks at once and extrapolate to display time
+            smoothing_filter.update(points, hand_frame.timestamp)
+            predicted = smoothing_filter.predict(time.time() + display_lead)
 
             # Get index finger coordinates
-            x1 = int(lmList[8].x * cam_w)
-            y1 = int(lmList[8].y * cam_h)
+            x1 = predicted[8, 0] * cam_w
+            y1 = predicted[8, 1] * cam_h
 
             # Convert to screen coordinates
             screen_x = np.interp(x1, (100, cam_w - 100), (0, screen_w))
             screen_y = np.interp(y1, (100, cam_h - 100), (0, screen_h))
-
-            # Smooth movement
-            curr_x = prev_x + (screen_x - prev_x) / smoothening
-            curr_y = prev_y + (screen_y - prev_y) / smoothening
-            pyautogui.moveTo(curr_x, curr_y)
-            prev_x, prev_y = curr_x, curr_y
+            cursor.move_to(screen_x, screen_y)
 
             # Get finger status
-            fingers = fingers_up(lmList)
-
-            # Perform actions
-            current_time = time.time()
+            fingers = fingers_up(points)
+            gesture = classify_gesture(fingers)
 
             if fingers == [1, 1, 1, 1]:
-                cv2.putText(img, "Move Cursor", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0,255,0), 2)
-
-            elif fingers[0] == 1 and fingers[1] == 0 and (current_time - last_left_click > click_delay):
-                pyautogui.click()
-                last_left_click = current_time
-                cv2.putText(img, "Left Click", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255,0,0), 2)
-
-            elif fingers[0] == 0 and fingers[1] == 1 and (current_time - last_right_click > click_delay):
-                pyautogui.rightClick()
-                last_right_click = current_time
-                cv2.putText(img, "Right Click", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0,0,255), 2)
-
-            elif fingers == [1, 0, 0, 0] and (current_time - last_scroll > 0.3):
-                pyautogui.scroll(40)
-                last_scroll = current_time
-                cv2.putText(img, "Scroll Up", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0,255,255), 2)
-
-            elif fingers == [0, 1, 0, 0] and (current_time - last_scroll > 0.3):
-                pyautogui.scroll(-40)
-                last_scroll = current_time
-                cv2.putText(img, "Scroll Down", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255,255,0), 2)
-
-            # Screenshot when all fingers are down (fist)
-            elif fingers == [0, 0, 0, 0] and (current_time - last_screenshot > screenshot_delay):
-                screenshot = pyautogui.screenshot()
-                filename = f"screenshot_{int(time.time())}.png"
-                screenshot.save(filename)
-                last_screenshot = current_time
-                cv2.putText(img, "Screenshot Taken", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0,128,255), 2)
-
-    else:
-        cv2.putText(img, "No Hand Detected", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (200, 0, 200), 2)
-
-    # Display the output
-    cv2.imshow("Virtual Mouse", img)
-    if cv2.waitKey(1) & 0xFF == 27:  # ESC to quit
+                texts.append(("Move Cursor", (10, 30), (0, 255, 0)))
+
+    # Perform actions on debounced gesture events
+    label = None
+    for event in gestures.update(gesture, hand_frame.timestamp):
+        if event.kind == PRESS and event.gesture == 'left_click':
+            inputs.click()
+            label = 'left_click'
+        elif event.kind == PRESS and event.gesture == 'right_click':
+            inputs.right_click()
+            label = 'right_click'
+        elif event.kind == HOLD and event.gesture == 'left_click' and fingers == [1, 0, 0, 0]:
+            inputs.scroll(40)
+            label = 'scroll_up'
+        elif event.kind == HOLD and event.gesture == 'right_click' and fingers == [0, 1, 0, 0]:
+            inputs.scroll(-40)
+            label = 'scroll_down'
+        # Screenshot when all fingers are down (fist)
+        elif event.kind == PRESS and event.gesture == 'fist':
+            shot = screenshots.take()
+    if label:
+        text, color = GESTURE_LABELS[label]
+        preview.flash(text, (10, 30), color)
+    if shot is not None:
+        if shot.done() and time.time() - shot.finished_at > SHOT_CONFIRM_SECONDS:
+            shot = None
+        else:
+            text, color = SHOT_LABELS.get(shot.status, ("Screenshot Failed", (0, 0, 255)))
+            texts.append((text, (10, 70), color))
+
+    if not len(hand_frame.hands):
+        texts.append(("No Hand Detected", (10, 30), (200, 0, 200)))
+
+    # Drawn and shown by the preview thread at its own rate
+    preview.submit(hand_frame.frame, hand_frame.hands, texts)
+    if preview.quit_requested:  # ESC in the preview window
+        break
+    if inputs.failsafe_triggered:  # Cursor pushed into a screen corner
         break
 
-cap.release()
-cv2.destroyAllWindows()
+preview.close()
+inputs.close()
+print(f"🖱️ Input stats: {inputs.stats()}")
+screenshots.close()
+print(f"📸 Screenshot stats: {screenshots.stats()}")
+source.close()
@@ -0,0 +1,249 @@
+"""
+Background screenshots for the gesture modes.
+
+take() returns a ScreenshotHandle immediately; grabbing the screen, encoding
+and writing the file all happen on worker threads, so the vision loop (and the
+cursor) never waits on them:
+
+  capture thread   grabs the screen and converts it into one of a few
+                   reusable BGR buffers (the grab itself still allocates:
+                   pyautogui returns a new PIL image, read as one RGB array)
+  encode thread    PNG at a fast compression level, or lossless WebP
+  writer thread    writes every encoded file that is waiting in one batch
+
+The buffers double as the backpressure signal: when the encoder or the disk
+falls behind and all of them are taken, take() drops the shot (the handle says
+so) instead of queueing more screen-sized images. stats() reports drops, queue
+depths and per-stage latency.
+"""
+
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from latency_stats import LatencyStats
+
+PENDING = 'pending'
+SAVED = 'saved'
+DROPPED = 'dropped'
+FAILED = 'failed'
+
+FORMATS = ('png', 'webp')
+
+
+class ScreenshotHandle:
+    def __init__(self, filename):
+        self.filename = filename
+        self.requested_at = time.time()
+        self.finished_at = None
+        self.status = PENDING
+        self.error = None
+        self.stage_ms = {}
+        self._done = threading.Event()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        # True once the shot was saved, dropped or failed
+        return self._done.wait(timeout)
+
+    def _finish(self, status, error=None):
+        self.status = status
+        self.error = error
+        self.finished_at = time.time()
+        self._done.set()
+
+
+class ScreenshotService:
+    def __init__(self, directory='.', fmt='png', png_compression=1, buffers=2, max_pending_writes=4,
+                 batch_size=8, grab=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown screenshot format {fmt!r}, expected one of {FORMATS}")
+        self.directory = directory
+        self.extension = '.' + fmt
+        if fmt == 'png':
+            # zlib level 1: somewhat larger files than OpenCV's default level 3, much faster on large screens
+            self.encode_params = [cv2.IMWRITE_PNG_COMPRESSION, png_compression]
+        else:
+            # OpenCV switches WebP to lossless mode above quality 100
+            self.encode_params = [cv2.IMWRITE_WEBP_QUALITY, 101]
+        self.batch_size = batch_size
+        if grab is None:
+            import pyautogui
+            grab = pyautogui.screenshot
+        self.grab = grab
+
+        self.buffers = [None] * buffers
+        self.free_buffers = queue.Queue()
+        for index in range(buffers):
+            self.free_buffers.put(index)
+        self.capture_queue = queue.Queue()
+        self.encode_queue = queue.Queue()
+        self.write_queue = queue.Queue(maxsize=max_pending_writes)
+
+        self.latency = LatencyStats()
+        self.requested = 0
+        self.saved = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.bytes_written = 0
+
+        self.threads = [
+            threading.Thread(target=target, name=name, daemon=True)
+            for target, name in ((self._capture_loop, 'screenshot-capture'),
+                                 (self._encode_loop, 'screenshot-encode'),
+                                 (self._write_loop, 'screenshot-writer'))
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    # Called from the vision loop
+
+    def take(self, filename=None):
+        if filename is None:
+            filename = f"screenshot_{int(time.time() * 1000)}{self.extension}"
+        handle = ScreenshotHandle(os.path.join(self.directory, filename))
+        self.requested += 1
+        try:
+            index = self.free_buffers.get_nowait()
+        except queue.Empty:
+            # Every buffer is still waiting on the encoder or the disk
+            self.dropped += 1
+            handle._finish(DROPPED, "encoder/disk busy")
+            print(f"⚠️ Screenshot dropped, {self.write_queue.qsize()} files waiting for the disk")
+            return handle
+        self.capture_queue.put((handle, index))
+        return handle
+
+    @property
+    def backpressure(self):
+        return self.free_buffers.empty() or self.write_queue.full()
+
+    def stats(self):
+        return {
+            'requested': self.requested,
+            'saved': self.saved,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'batches': self.batches,
+            'mb_written': round(self.bytes_written / 1e6, 1),
+            'free_buffers': self.free_buffers.qsize(),
+            'pending_writes': self.write_queue.qsize(),
+            'backpressure': self.backpressure,
+            'latency': {
+                stage: {key: summary[key] for key in ('count', 'p50_ms', 'p95_ms', 'p99_ms')}
+                for stage, summary in self.latency.summary().items()
+            }
+        }
+
+    def close(self):
+        # Shots already taken are still written
+        self.capture_queue.put(None)
+        for thread in self.threads:
+            thread.join(timeout=5.0)
+
+    # Worker threads
+
+    def _fail(self, handle, index, error):
+        if index is not None:
+            self.free_buffers.put(index)
+        self.failed += 1
+        handle._finish(FAILED, str(error))
+        print(f"❌ Screenshot {handle.filename} failed: {error}")
+
+    def _capture_loop(self):
+        while True:
+            item = self.capture_queue.get()
+            if item is None:
+                self.encode_queue.put(None)
+                return
+            handle, index = item
+            start = time.perf_counter()
+            try:
+                image = self.grab()
+                # pyautogui hands back a PIL image, already RGB on every platform; a grab callable
+                # may also return an RGB array
+                if hasattr(image, 'convert') and image.mode != 'RGB':
+                    image = image.convert('RGB')
+                rgb = np.asarray(image)
+                buffer = self.buffers[index]
+                if buffer is None or buffer.shape != rgb.shape:
+                    buffer = self.buffers[index] = np.empty_like(rgb)
+                # The BGR copy the encoder reads lives in the reused buffer
+                cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR, dst=buffer)
+            except Exception as e:
+                self._fail(handle, index, e)
+                continue
+            handle.stage_ms['capture'] = (time.perf_counter() - start) * 1000
+            self.encode_queue.put((handle, index))
+
+    def _encode_loop(self):
+        while True:
+            item = self.encode_queue.get()
+            if item is None:
+                self.write_queue.put(None)
+                return
+            handle, index = item
+            start = time.perf_counter()
+            try:
+                ok, data = cv2.imencode(self.extension, self.buffers[index], self.encode_params)
+            except Exception as e:
+                # Whatever went wrong, the buffer goes back so later shots aren't dropped
+                self._fail(handle, index, e)
+                continue
+            self.free_buffers.put(index)
+            if not ok:
+                self._fail(handle, None, "encoder returned no data")
+                continue
+            handle.stage_ms['encode'] = (time.perf_counter() - start) * 1000
+            # Blocks while the disk is behind, which keeps buffers busy and makes take() drop
+            self.write_queue.put((handle, data))
+
+    def _write_loop(self):
+        while True:
+            item = self.write_queue.get()
+            if item is None:
+                return
+            # Whatever else is already encoded goes out in the same batch; a lone shot never waits
+            batch = [item]
+            closing = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+            self._write_batch(batch)
+            if closing:
+                return
+
+    def _write_batch(self, batch):
+        written = []
+        for handle, data in batch:
+            start = time.perf_counter()
+            try:
+                with open(handle.filename, 'wb') as f:
+                    f.write(data)
+            except OSError as e:
+                self._fail(handle, None, e)
+                continue
+            # Each file's own write time, not the whole batch's
+            handle.stage_ms['write'] = (time.perf_counter() - start) * 1000
+            self.bytes_written += data.nbytes
+            written.append(handle)
+        self.batches += 1
+        # Handles finish together once the batch is out, so a caller sees one consistent state
+        for handle in written:
+            handle._finish(SAVED)
+            self.saved += 1
+            self.latency.record_all(handle.stage_ms)
+            self.latency.record('total', (handle.finished_at - handle.requested_at) * 1000)
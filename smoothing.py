@@ -0,0 +1,161 @@
+"""
+Landmark smoothing and prediction filters.
+
+Every filter works element-wise on arrays of any shape, normally a whole
+(21, 3) hand at once, and is driven by frame timestamps in seconds, so it
+adapts to the real frame rate. Besides update(), each filter can predict()
+where the landmarks will be at a later time, so the cursor can be placed where
+the hand will be when the frame reaches the display instead of where it was
+when the camera saw it.
+
+  one_euro   speed-adaptive low-pass: steady when still, responsive when fast
+  kalman     constant-velocity Kalman filter with white-noise acceleration
+  velocity   alpha-beta (constant-velocity) tracker, the cheapest predictor
+
+make_filter(name, **options) builds one by name.
+"""
+
+import math
+
+import numpy as np
+
+
+class LandmarkFilter:
+    # Shared bookkeeping: predictions never reach further ahead than max_horizon seconds,
+    # so a stalled camera doesn't fling the cursor along the last velocity
+    def __init__(self, max_horizon=0.05):
+        self.max_horizon = max_horizon
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.v = None
+        self.t = None
+
+    def update(self, measurement, timestamp):
+        measurement = np.asarray(measurement, dtype=np.float64)
+        if self.x is None or self.x.shape != measurement.shape:
+            self._start(measurement)
+            self.t = timestamp
+            return self.x
+        if timestamp <= self.t:
+            # Same frame seen twice; nothing new to learn from it
+            return self.x
+        dt = timestamp - self.t
+        self.t = timestamp
+        self._step(measurement, dt)
+        return self.x
+
+    def predict(self, timestamp):
+        if self.x is None:
+            return None
+        horizon = min(max(timestamp - self.t, 0.0), self.max_horizon)
+        return self.x + self.v * horizon
+
+    def _start(self, measurement):
+        self.x = measurement.copy()
+        self.v = np.zeros_like(measurement)
+
+    def _step(self, measurement, dt):
+        raise NotImplementedError
+
+
+class OneEuroFilter(LandmarkFilter):
+    # Casiez et al.'s 1-euro filter. Defaults suit normalized image coordinates (speeds of ~0.1-2 / s);
+    # raise beta to cut lag on fast moves, lower min_cutoff to cut jitter when still.
+    def __init__(self, min_cutoff=1.0, beta=10.0, d_cutoff=1.0, max_horizon=0.05):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        super().__init__(max_horizon)
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def _step(self, measurement, dt):
+        raw_velocity = (measurement - self.x) / dt
+        self.v += self._alpha(self.d_cutoff, dt) * (raw_velocity - self.v)
+        cutoff = self.min_cutoff + self.beta * np.abs(self.v)
+        self.x += self._alpha(cutoff, dt) * (measurement - self.x)
+
+
+class KalmanFilter(LandmarkFilter):
+    # Independent constant-velocity Kalman filter per coordinate; the 2x2 covariance is kept as three arrays.
+    # process_noise: acceleration variance; measurement_noise: landmark jitter variance (normalized units).
+    def __init__(self, process_noise=50.0, measurement_noise=1e-5, max_horizon=0.05):
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        super().__init__(max_horizon)
+
+    def _start(self, measurement):
+        super()._start(measurement)
+        self.p_xx = np.full_like(measurement, self.measurement_noise)
+        self.p_xv = np.zeros_like(measurement)
+        self.p_vv = np.full_like(measurement, 1.0)
+
+    def _step(self, measurement, dt):
+        # Predict
+        q = self.process_noise
+        self.x += self.v * dt
+        self.p_xx += dt * (2 * self.p_xv + dt * self.p_vv) + q * dt ** 3 / 3
+        self.p_xv += dt * self.p_vv + q * dt ** 2 / 2
+        self.p_vv += q * dt
+        # Correct
+        innovation = measurement - self.x
+        s = self.p_xx + self.measurement_noise
+        k_x = self.p_xx / s
+        k_v = self.p_xv / s
+        self.x += k_x * innovation
+        self.v += k_v * innovation
+        self.p_vv -= k_v * self.p_xv
+        self.p_xv *= 1 - k_x
+        self.p_xx *= 1 - k_x
+
+
+class VelocityFilter(LandmarkFilter):
+    # Alpha-beta tracker: alpha weights the new position, beta the velocity correction
+    def __init__(self, alpha=0.5, beta=0.1, max_horizon=0.05):
+        self.alpha = alpha
+        self.beta = beta
+        super().__init__(max_horizon)
+
+    def _step(self, measurement, dt):
+        self.x += self.v * dt
+        residual = measurement - self.x
+        self.x += self.alpha * residual
+        self.v += self.beta / dt * residual
+
+
+FILTERS = {
+    'one_euro': OneEuroFilter,
+    'kalman': KalmanFilter,
+    'velocity': VelocityFilter
+}
+
+
+def make_filter(name, **options):
+    if name not in FILTERS:
+        raise ValueError(f"Unknown smoothing filter {name!r}, expected one of {sorted(FILTERS)}")
+    return FILTERS[name](**options)
+
+
+class CursorCoalescer:
+    # Skips cursor moves smaller than min_delta pixels, so sub-pixel jitter never reaches the OS
+    def __init__(self, move, min_delta=1.0):
+        self.move = move
+        self.min_delta = min_delta
+        self.position = None
+        self.moves = 0
+        self.skipped = 0
+
+    def move_to(self, x, y):
+        # Returns True when the cursor was actually moved
+        if self.position is not None and math.hypot(x - self.position[0], y - self.position[1]) < self.min_delta:
+            self.skipped += 1
+            return False
+        self.move(int(round(x)), int(round(y)))
+        self.position = (x, y)
+        self.moves += 1
+        return True
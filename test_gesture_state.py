@@ -0,0 +1,105 @@
+"""
+Table-driven checks of the time-based gesture debounce in gesture_state.
+"""
+
+import pytest
+
+from gesture_state import HOLD, PRESS, RELEASE, GestureStateMachine, pressed
+
+
+def run(machine, frames):
+    # frames: (gesture, timestamp[, confidence]); returns [(kind, gesture, timestamp)] in order
+    events = []
+    for gesture, timestamp, *confidence in frames:
+        for event in machine.update(gesture, timestamp, *confidence):
+            events.append((event.kind, event.gesture, event.timestamp))
+    return events
+
+
+CASES = {
+    'press after press_ms': (
+        dict(press_ms=100),
+        [('fist', 0.00), ('fist', 0.05), ('fist', 0.10), ('fist', 0.15)],
+        [(PRESS, 'fist', 0.10)],
+    ),
+    'too short to press': (
+        dict(press_ms=100),
+        [('fist', 0.00), ('fist', 0.05), (None, 0.10), ('fist', 0.15)],
+        [],
+    ),
+    'same press at any frame rate': (
+        dict(press_ms=100),
+        [('fist', 0.0), ('fist', 0.1)],
+        [(PRESS, 'fist', 0.1)],
+    ),
+    'hold after hold_ms': (
+        dict(press_ms=0, hold_ms=500),
+        [('fist', 0.0), ('fist', 0.4), ('fist', 0.5), ('fist', 0.9)],
+        [(PRESS, 'fist', 0.0), (HOLD, 'fist', 0.5)],
+    ),
+    'hold repeats every repeat_ms': (
+        dict(press_ms=0, hold_ms=500, repeat_ms=200),
+        [('fist', 0.0), ('fist', 0.5), ('fist', 0.6), ('fist', 0.7), ('fist', 0.9)],
+        [(PRESS, 'fist', 0.0), (HOLD, 'fist', 0.5), (HOLD, 'fist', 0.7), (HOLD, 'fist', 0.9)],
+    ),
+    'release after release_ms missing': (
+        dict(press_ms=0, release_ms=100),
+        [('fist', 0.0), ('fist', 0.2), (None, 0.25), (None, 0.30)],
+        [(PRESS, 'fist', 0.0), (RELEASE, 'fist', 0.30)],
+    ),
+    'short dropout does not release': (
+        dict(press_ms=0, release_ms=100),
+        [('fist', 0.0), (None, 0.05), ('fist', 0.10), (None, 0.15), (None, 0.20)],
+        [(PRESS, 'fist', 0.0), (RELEASE, 'fist', 0.20)],
+    ),
+    'different gesture releases the active one': (
+        dict(press_ms=0, release_ms=100),
+        [('fist', 0.0), ('palm', 0.05), ('palm', 0.1)],
+        [(PRESS, 'fist', 0.0), (RELEASE, 'fist', 0.1), (PRESS, 'palm', 0.1)],
+    ),
+    'cooldown blocks a quick re-press': (
+        dict(press_ms=0, release_ms=0, cooldown_ms=500),
+        [('fist', 0.0), (None, 0.1), ('fist', 0.2), ('fist', 0.4), ('fist', 0.5)],
+        [(PRESS, 'fist', 0.0), (RELEASE, 'fist', 0.1), (PRESS, 'fist', 0.5)],
+    ),
+    'cooldown is per gesture': (
+        dict(press_ms=0, release_ms=0, cooldown_ms=500),
+        [('fist', 0.0), ('palm', 0.1)],
+        [(PRESS, 'fist', 0.0), (RELEASE, 'fist', 0.1), (PRESS, 'palm', 0.1)],
+    ),
+    'low confidence does not press': (
+        dict(press_ms=0, press_confidence=0.7, release_confidence=0.5),
+        [('fist', 0.0, 0.6), ('fist', 0.1, 0.8)],
+        [(PRESS, 'fist', 0.1)],
+    ),
+    'hysteresis keeps a wobbling gesture active': (
+        dict(press_ms=0, release_ms=100, press_confidence=0.7, release_confidence=0.5),
+        [('fist', 0.0, 0.8), ('fist', 0.1, 0.6), ('fist', 0.2, 0.55), ('fist', 0.3, 0.6)],
+        [(PRESS, 'fist', 0.0)],
+    ),
+    'below release_confidence counts as missing': (
+        dict(press_ms=0, release_ms=100, press_confidence=0.7, release_confidence=0.5),
+        [('fist', 0.0, 0.8), ('fist', 0.05, 0.4), ('fist', 0.10, 0.4)],
+        [(PRESS, 'fist', 0.0), (RELEASE, 'fist', 0.10)],
+    ),
+}
+
+
+@pytest.mark.parametrize('options, frames, expected', CASES.values(), ids=CASES.keys())
+def test_gesture_state_machine(options, frames, expected):
+    assert run(GestureStateMachine(**options), frames) == expected
+
+
+def test_release_reports_how_long_it_was_held():
+    machine = GestureStateMachine(press_ms=0, release_ms=100)
+    machine.update('fist', 1.0)
+    machine.update('fist', 1.4)
+    events = machine.update(None, 1.5)
+    assert [(event.kind, round(event.duration_ms)) for event in events] == [(RELEASE, 400)]
+
+
+def test_pressed_filters_by_gesture():
+    events = GestureStateMachine(press_ms=0).update('fist', 0.0)
+    assert pressed(events)
+    assert pressed(events, 'fist')
+    assert not pressed(events, 'palm')
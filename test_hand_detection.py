@@ -6,7 +6,7 @@ Run this to test if MediaPipe and hand detection are working properly
 
 import cv2
 import mediapipe as mp
-import numpy as np
+import landmark_features
 
 def test_hand_detection():
     print("🧪 Testing Hand Detection System...")
@@ -62,32 +62,9 @@ def test_hand_detection():
                         frame, hand_landmarks, mp_hands.HAND_CONNECTIONS
                     )
                     
-                    # Test fist detection
-                    landmarks = hand_landmarks.landmark
-                    
-                    # Simple fist detection
-                    index_folded = landmarks[8].y > landmarks[6].y + 0.02
-                    middle_folded = landmarks[12].y > landmarks[10].y + 0.02
-                    ring_folded = landmarks[16].y > landmarks[14].y + 0.02
-                    pinky_folded = landmarks[20].y > landmarks[18].y + 0.02
-                    
-                    # Thumb distance check
-                    thumb_distance = np.sqrt(
-                        (landmarks[4].x - landmarks[5].x)**2 + 
-                        (landmarks[4].y - landmarks[5].y)**2
-                    )
-                    thumb_folded = thumb_distance < 0.15
-                    
-                    # Fingertips below base check
-                    fingertips_below = (
-                        landmarks[8].y > landmarks[5].y and
-                        landmarks[12].y > landmarks[9].y and
-                        landmarks[16].y > landmarks[13].y and
-                        landmarks[20].y > landmarks[17].y
-                    )
-                    
-                    is_fist = (index_folded and middle_folded and ring_folded and 
-                             pinky_folded and thumb_folded and fingertips_below)
+                    # Test fist detection with the same rules the server uses
+                    points = landmark_features.landmarks_to_array(hand_landmarks)
+                    is_fist = bool(landmark_features.is_fist(points))
                     
                     # Display status
                     if is_fist:
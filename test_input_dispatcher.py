@@ -0,0 +1,57 @@
+"""
+InputDispatcher must stop injecting when the backend's corner fail-safe fires.
+"""
+
+import threading
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from input_dispatcher import InputDispatcher  # noqa: E402
+
+
+class FailSafe(Exception):
+    pass
+
+
+class CornerBackend:
+    # Raises its fail-safe on the first click, records everything else
+    failsafe_errors = (FailSafe,)
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def moveTo(self, x, y):
+        # Holds the dispatcher thread so the test can queue actions behind the click
+        self.release.wait()
+        self.calls.append(('moveTo', x, y))
+
+    def click(self):
+        raise FailSafe("cursor in a corner")
+
+    def press(self, key):
+        self.calls.append(('press', key))
+
+    def close(self):
+        pass
+
+
+def test_failsafe_stops_the_dispatcher():
+    backend = CornerBackend()
+    dispatcher = InputDispatcher(backend=backend)
+    dispatcher.move_to(10, 20)
+    dispatcher.click()
+    dispatcher.press('space')
+    backend.release.set()
+    dispatcher.thread.join(timeout=2.0)
+
+    assert not dispatcher.thread.is_alive()
+    assert dispatcher.failsafe_triggered
+    assert backend.calls == [('moveTo', 10, 20)]
+    # Nothing is queued once it has stopped
+    dispatcher.press('space')
+    assert not dispatcher.actions
+    dispatcher.close()
+    assert dispatcher.stats()['errors'] == 0
@@ -0,0 +1,98 @@
+"""
+Delta landmark encoding must stay in step with what each client actually received,
+results that return a flow-control credit must always reach the client, and
+legacy JSON results must honor the landmark settings too.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+pytest.importorskip('mediapipe')
+pytest.importorskip('websockets')
+
+from hand_detection_server import (  # noqa: E402
+    RESULT_FLAG_DELTA, RESULT_HEADER, ClientChannel, ResultEncoder, WebSocketServer, quantize_landmarks
+)
+
+
+class BlockingWebSocket:
+    # send() stays in flight until release() is called, like a client that stopped reading
+    def __init__(self):
+        self.sent = []
+        self.released = asyncio.Event()
+
+    async def send(self, message):
+        await self.released.wait()
+        self.sent.append(message)
+
+    def release(self):
+        self.released.set()
+
+
+def detection(offset):
+    points = np.full((21, 3), 0.5, dtype=np.float32) + offset
+    return {'hand_detected': True, 'fist_detected': False, 'confidence': 0.6, 'landmarks': points}
+
+
+def decode(message, base):
+    flags = RESULT_HEADER.unpack_from(message)[1]
+    values = np.frombuffer(message, dtype='<i2', offset=RESULT_HEADER.size).astype(np.int32)
+    is_delta = bool(flags & RESULT_FLAG_DELTA)
+    return (base + values if is_delta else values), is_delta
+
+
+def test_dropped_result_does_not_advance_delta_chain():
+    async def scenario():
+        server = WebSocketServer(inference_workers=1)
+        websocket = BlockingWebSocket()
+        channel = ClientChannel(websocket, session_id=1, max_pending=1)
+        channel.encoder.configure({'result_format': 'binary', 'delta_landmarks': True})
+
+        server.deliver_detection(channel, detection(0.00))   # keyframe, send stays in flight
+        server.deliver_detection(channel, detection(0.01))   # no capacity: dropped
+        assert channel.dropped_results == 1
+        websocket.release()
+        await asyncio.gather(*channel.pending)
+        server.deliver_detection(channel, detection(0.02))   # delta must be against the keyframe
+        await asyncio.gather(*channel.pending)
+        server.inference_pool.shutdown()
+        return websocket.sent
+
+    first, third = asyncio.run(scenario())
+    base, is_delta = decode(first, None)
+    assert not is_delta
+    received, is_delta = decode(third, base)
+    assert is_delta
+    expected = quantize_landmarks(detection(0.02)['landmarks']).reshape(-1)
+    assert np.array_equal(received, expected)
+
+
+def test_credit_bearing_result_is_never_dropped():
+    async def scenario():
+        server = WebSocketServer(inference_workers=1)
+        websocket = BlockingWebSocket()
+        channel = ClientChannel(websocket, session_id=1, max_pending=1)
+        channel.flow_control = True
+
+        server.deliver_detection(channel, detection(0.00))
+        server.deliver_detection(channel, detection(0.01))   # over max_pending, but carries a credit
+        assert channel.dropped_results == 0
+        websocket.release()
+        await asyncio.gather(*channel.pending)
+        server.inference_pool.shutdown()
+        return websocket.sent
+
+    assert len(asyncio.run(scenario())) == 2
+
+
+def test_json_results_honor_include_landmarks():
+    encoder = ResultEncoder()
+    encoder.configure({'result_format': 'json', 'include_landmarks': False, 'delta_landmarks': True})
+    assert not encoder.delta_landmarks
+    data = json.loads(encoder.encode(detection(0.0)))['data']
+    assert 'landmarks' not in data
+    assert data['hand_detected']